@@ -0,0 +1,182 @@
+"""Benchmark :func:`atlas_schema.isin` against comparing to each test element.
+
+Membership of a jagged integer array is tested against test sets of growing
+size, both eagerly and on a multi-partition ``dask_awkward`` array. For each
+case, the current implementation is compared to the reference implementation
+that broadcasts ``element == test_elements`` and reduces with ``ak.any``:
+
+* ``eager``: time (and peak traced memory) of an eager call
+* ``dask``: number of tasks and pickled size of the graph added on top of the
+  input partitions, and time to compute it
+
+.. code-block:: bash
+
+   python benchmarks/bench_isin.py --output isin.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import itertools
+import json
+import platform
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+import awkward as ak
+import cloudpickle
+import dask
+import dask_awkward as dak
+import numpy as np
+from bench_schema import git_commit, timeit
+
+import atlas_schema
+from atlas_schema.utils import _isin_broadcast, isin
+
+IMPLEMENTATIONS: dict[str, Callable[[Any, ak.Array], Any]] = {
+    "isin": isin,
+    "broadcast": lambda element, test_elements: _isin_broadcast(
+        element, test_elements, -1
+    ),
+}
+
+
+def synthetic_element(events: int, seed: int = 0) -> ak.Array:
+    """Jagged array of truth-barcode-like integers, 0 to 9 per event."""
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(0, 10, events)
+    return ak.unflatten(rng.integers(0, 1_000_000, counts.sum()), counts)
+
+
+def peak_memory(func: Callable[[], Any]) -> int:
+    """Peak memory traced while running *func*, in bytes."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(
+    events: int,
+    partitions: int,
+    test_size: int,
+    implementation: str,
+    repeat: int,
+    max_eager_entries: int,
+) -> dict[str, Any]:
+    """Benchmark a single point of the grid."""
+    func = IMPLEMENTATIONS[implementation]
+    element = synthetic_element(events)
+    test_elements = ak.Array(np.linspace(0, 1_000_000, test_size, dtype=np.int64))
+    result: dict[str, Any] = {
+        "params": {
+            "events": events,
+            "partitions": partitions,
+            "test_size": test_size,
+            "implementation": implementation,
+        }
+    }
+
+    # comparing to each test element builds a temporary with this many entries
+    entries = len(ak.flatten(element)) * test_size
+    if implementation == "isin" or entries <= max_eager_entries:
+        result["eager"] = {
+            **timeit(lambda: func(element, test_elements), repeat),
+            "peak_bytes": peak_memory(lambda: func(element, test_elements)),
+        }
+
+    delement = dak.from_awkward(element, npartitions=partitions)
+    graph = func(delement, test_elements)
+    # only count the tasks added on top of the input partitions
+    tasks = {
+        key: task
+        for key, task in dict(graph.dask).items()
+        if key not in dict(delement.dask)
+    }
+    result["dask"] = {
+        "tasks": len(tasks),
+        "layers": len(graph.dask.layers) - len(delement.dask.layers),
+        "graph_bytes": len(cloudpickle.dumps(tasks)),
+    }
+    if implementation == "isin" or entries <= max_eager_entries:
+        result["dask"].update(
+            timeit(lambda: dask.compute(graph, scheduler="sync"), repeat)
+        )
+    return result
+
+
+def case_key(params: dict[str, Any]) -> str:
+    return ",".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+
+def int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--events", type=int_list, default=[100_000])
+    parser.add_argument("--partitions", type=int, default=20)
+    parser.add_argument("--test-sizes", type=int_list, default=[3, 100, 2000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--max-eager-entries",
+        type=int,
+        default=50_000_000,
+        help="skip running the broadcast reference above this temporary size",
+    )
+    parser.add_argument(
+        "--output", type=Path, default=Path("benchmark-isin.json"), help="JSON results"
+    )
+    args = parser.parse_args(argv)
+
+    results: dict[str, Any] = {
+        "created": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "versions": {
+            "atlas_schema": atlas_schema.__version__,
+            "awkward": ak.__version__,
+            "dask_awkward": dak.__version__,
+        },
+        "repeat": args.repeat,
+        "cases": [],
+    }
+    grid = itertools.product(args.events, args.test_sizes, IMPLEMENTATIONS)
+    for events, test_size, implementation in grid:
+        case = run_case(
+            events,
+            args.partitions,
+            test_size,
+            implementation,
+            args.repeat,
+            args.max_eager_entries,
+        )
+        results["cases"].append(case)
+        summary = []
+        if "eager" in case:
+            summary.append(
+                f"eager={case['eager']['median'] * 1e3:.1f}ms/{case['eager']['peak_bytes'] / 1e6:.0f}MB"
+            )
+        summary.append(
+            f"dask={case['dask']['tasks']}tasks/{case['dask']['graph_bytes'] / 1e3:.0f}kB"
+        )
+        if "median" in case["dask"]:
+            summary.append(f"compute={case['dask']['median'] * 1e3:.1f}ms")
+        print(f"{case_key(case['params'])}: {' '.join(summary)}", flush=True)  # noqa: T201
+
+    args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""Benchmark building :class:`~atlas_schema.schema.NtupleSchema` over synthetic ntuples.
+
+Every combination of the requested grid (collections, branches per collection,
+systematics and singletons) is turned into a synthetic preloaded column source
+with the usual ``{collection}_{subcollection}_{systematic}`` branch names, and
+the following steps are timed:
+
+* ``schema``: ``NtupleSchema(base_form)``
+* ``nominal``: ``NtupleSchema.nominal(base_form)``, without systematics
+* ``discover_systematics``: ``NtupleSchema._discover_systematics(...)``
+* ``events``: ``NanoEventsFactory.from_preloaded(...).events()``
+
+Results are written as JSON, and can be compared against the results of
+another commit:
+
+.. code-block:: bash
+
+   python benchmarks/bench_schema.py --output before.json
+   git switch my-branch
+   python benchmarks/bench_schema.py --output after.json --compare before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import datetime as dt
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Callable, ClassVar
+from uuid import uuid4
+
+import awkward as ak
+import coffea
+from coffea.nanoevents import NanoEventsFactory
+from coffea.nanoevents.mapping import SimplePreloadedColumnSource
+from coffea.nanoevents.mapping.preloaded import PreloadedSourceMapping
+
+import atlas_schema
+from atlas_schema.schema import NtupleSchema
+
+#: collection names, the first ones being known mixins of NtupleSchema
+COLLECTIONS = ["jet", "el", "mu", "ph", "met"]
+#: subcollections that get systematic variations (``_NOSYS`` branches)
+VARIED = ["pt", "eta", "phi", "m", "select_baseline", "select_btag"]
+
+STEPS = ("schema", "nominal", "discover_systematics", "events")
+
+
+def synthetic_columns(
+    collections: int, branches: int, systematics: int, singletons: int, events: int
+) -> dict[str, ak.Array]:
+    """Build the columns of a synthetic ntuple.
+
+    Each collection has *branches* subcollections, the first few of which are
+    stored as ``_NOSYS``. Systematic ``i`` varies the first of those
+    subcollections in collection ``i % collections`` (and ``pt`` in every
+    other collection for even ``i``), similar to real ntuples where most
+    systematics affect a handful of collections.
+    """
+    jagged = ak.Array([[float(i)] * (i % 4) for i in range(events)])
+    flat = ak.Array([[float(i)] for i in range(events)])
+
+    names = [
+        COLLECTIONS[i] if i < len(COLLECTIONS) else f"coll{i}"
+        for i in range(collections)
+    ]
+    columns = dict.fromkeys(sorted(NtupleSchema.event_ids), flat)
+    for name in names:
+        for j in range(branches):
+            subcollection = VARIED[j] if j < len(VARIED) else f"var{j}"
+            suffix = "_NOSYS" if j < len(VARIED) else ""
+            columns[f"{name}_{subcollection}{suffix}"] = jagged
+    for i in range(systematics):
+        systematic = f"SYS{i // 2}__1{'up' if i % 2 == 0 else 'down'}"
+        for k, name in enumerate(names):
+            if k == i % collections or (i % 2 == 0 and branches):
+                columns[f"{name}_{VARIED[0]}_{systematic}"] = jagged
+    for i in range(singletons):
+        columns[f"singleton{i}"] = flat
+    return columns
+
+
+def schema_with_singletons(singletons: int) -> type[NtupleSchema]:
+    """Schema class treating the synthetic singleton branches as singletons."""
+
+    names = {f"singleton{i}" for i in range(singletons)}
+
+    class BenchmarkSchema(NtupleSchema):
+        singletons: ClassVar[set[str]] = names
+
+    return BenchmarkSchema
+
+
+def timeit(func: Callable[[], Any], repeat: int) -> dict[str, float]:
+    """Time *func* *repeat* times, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "max": max(times),
+    }
+
+
+def run_case(
+    collections: int,
+    branches: int,
+    systematics: int,
+    singletons: int,
+    events: int,
+    repeat: int,
+) -> dict[str, Any]:
+    """Benchmark a single point of the grid."""
+    columns = synthetic_columns(collections, branches, systematics, singletons, events)
+    schemaclass = schema_with_singletons(singletons)
+    base_form = PreloadedSourceMapping._extract_base_form(columns)
+
+    # the schema modifies its base form in place, so copy it up front
+    base_forms = [copy.deepcopy(base_form) for _ in range(2 * repeat)]
+
+    def build_schema() -> None:
+        schemaclass(base_forms.pop())
+
+    def build_nominal() -> None:
+        schemaclass.nominal(base_forms.pop())
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        schema = schemaclass(copy.deepcopy(base_form))
+    branch_forms = dict(zip(base_form["fields"], base_form["contents"]))
+    collection_names = {
+        k.split("_")[0] for k in branch_forms if k not in schema.singletons
+    } - schema.event_ids
+    subcollection_names = {
+        k.split("_", 1)[1].removesuffix("_NOSYS")
+        for k in branch_forms
+        if "NOSYS" in k and k not in schema.singletons
+    }
+
+    def discover_systematics() -> None:
+        schema._discover_systematics(
+            branch_forms, collection_names, subcollection_names
+        )
+
+    def build_events() -> None:
+        src = SimplePreloadedColumnSource(
+            columns, uuid4(), events, object_path="/Events"
+        )
+        NanoEventsFactory.from_preloaded(src, schemaclass=schemaclass).events()
+
+    timings = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for step, func in zip(
+            STEPS, (build_schema, build_nominal, discover_systematics, build_events)
+        ):
+            timings[step] = timeit(func, repeat)
+
+    return {
+        "params": {
+            "collections": collections,
+            "branches": branches,
+            "systematics": systematics,
+            "singletons": singletons,
+            "events": events,
+        },
+        "n_branches": len(columns),
+        "n_fields": len(schema.form["fields"]),
+        "timings": timings,
+    }
+
+
+def case_key(params: dict[str, int]) -> str:
+    return ",".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    """Report the ratio of median timings against *baseline*, per case and step."""
+    reference = {case_key(case["params"]): case for case in baseline["cases"]}
+    lines = []
+    for case in results["cases"]:
+        key = case_key(case["params"])
+        if key not in reference:
+            continue
+        ratios = [
+            f"{step}={case['timings'][step]['median'] / reference[key]['timings'][step]['median']:.2f}x"
+            for step in STEPS
+            if step in reference[key]["timings"]
+        ]
+        lines.append(f"{key}: {' '.join(ratios)}")
+    return lines
+
+
+def int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--collections", type=int_list, default=[5, 20])
+    parser.add_argument(
+        "--branches", type=int_list, default=[10, 50], help="per collection"
+    )
+    parser.add_argument("--systematics", type=int_list, default=[0, 10, 100])
+    parser.add_argument("--singletons", type=int_list, default=[0, 50])
+    parser.add_argument("--events", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--output", type=Path, default=Path("benchmark.json"), help="JSON results"
+    )
+    parser.add_argument(
+        "--compare", type=Path, help="JSON results of a previous run to compare to"
+    )
+    args = parser.parse_args(argv)
+
+    results: dict[str, Any] = {
+        "created": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        },
+        "versions": {
+            "atlas_schema": atlas_schema.__version__,
+            "coffea": coffea.__version__,
+            "awkward": ak.__version__,
+        },
+        "repeat": args.repeat,
+        "cases": [],
+    }
+    grid = itertools.product(
+        args.collections, args.branches, args.systematics, args.singletons
+    )
+    for collections, branches, systematics, singletons in grid:
+        case = run_case(
+            collections, branches, systematics, singletons, args.events, args.repeat
+        )
+        results["cases"].append(case)
+        medians = " ".join(
+            f"{step}={timing['median'] * 1e3:.1f}ms"
+            for step, timing in case["timings"].items()
+        )
+        print(f"{case_key(case['params'])}: {medians}", flush=True)  # noqa: T201
+
+    args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        print(f"median ratio to {baseline.get('commit')}:")  # noqa: T201
+        for line in compare(results, baseline):
+            print(f"  {line}")  # noqa: T201
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
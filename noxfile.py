@@ -44,6 +44,15 @@ def tests(session: nox.Session) -> None:
     session.run("pytest", *session.posargs)
 
 
+@nox.session
+def benchmark(session: nox.Session) -> None:
+    """
+    Benchmark building the schema. Pass "--compare before.json" to compare to a previous run.
+    """
+    session.install(".")
+    session.run("python", "benchmarks/bench_schema.py", *session.posargs)
+
+
 @nox.session(reuse_venv=True)
 def docs(session: nox.Session) -> None:
     """
@@ -8,6 +8,8 @@ from __future__ import annotations
 
 import warnings
 
+# registers the runtime form transforms with coffea, needed to read any built form
+from atlas_schema import transforms  # noqa: F401
 from atlas_schema._version import version as __version__
 from atlas_schema.enums import ParticleOrigin, PhotonID
 from atlas_schema.utils import isin
@@ -0,0 +1,365 @@
+"""Branch-name helpers of :class:`~atlas_schema.schema.NtupleSchema` builds.
+
+The schema works out its collections and systematic variations from the names
+of the branches alone, following the ``{collection}_{subcollection}_{systematic}``
+pattern. This module holds the steps working on those names: selecting branches
+and systematics with glob patterns, aligning the branches of a file with those
+of a whole dataset, resolving the collection of every branch with a prefix trie
+over the mixin names, tokenizing every branch name once into the index the
+schema builds its records from, and matching collection names to the closest
+behavior.
+"""
+
+from __future__ import annotations
+
+import difflib
+import fnmatch
+import functools
+import re
+import warnings
+from collections.abc import Callable, Collection, Iterable
+from typing import Any
+
+from atlas_schema import transforms
+
+#: branch name to a list of ``(collection, remainder, [(subcollection, systematic), ...])``, see :func:`index_branches`
+BranchIndex = dict[str, list[tuple[str, str, list[tuple[str, str]]]]]
+
+
+def glob_matcher(patterns: Iterable[str]) -> Callable[[str], bool]:
+    """Match names against all the glob *patterns* at once."""
+    regex = re.compile(
+        "|".join(fnmatch.translate(pattern) for pattern in patterns) or "(?!)"
+    )
+    return lambda name: regex.match(name) is not None
+
+
+def filter_branches(
+    base_form: dict[str, Any],
+    include: Iterable[str] | None,
+    exclude: Iterable[str],
+    keep: Collection[str] = (),
+) -> dict[str, Any]:
+    """Keep the branches of *base_form* matching *include* and not *exclude*.
+
+    Args:
+        base_form (dict): form of the branches of a file
+        include (list[str] | None): glob patterns of the branches to keep, or ``None`` to keep all of them
+        exclude (list[str]): glob patterns of the branches to drop
+        keep (Collection[str]): branches kept unless matched by *exclude*, such as the event IDs
+
+    Returns:
+        dict: the form, with only the selected branches
+    """
+    included = None if include is None else glob_matcher(include)
+    excluded = glob_matcher(exclude)
+    fields, contents = [], []
+    for name, form in zip(base_form["fields"], base_form["contents"]):
+        if excluded(name):
+            continue
+        if included is None or name in keep or included(name):
+            fields.append(name)
+            contents.append(form)
+    return {**base_form, "fields": fields, "contents": contents}
+
+
+def select_systematics(
+    systematics: set[str], include: Iterable[str] | None, exclude: Iterable[str]
+) -> set[str]:
+    """Keep the *systematics* matching *include* and not *exclude*.
+
+    The nominal ``NOSYS`` is always kept.
+    """
+    return {
+        systematic
+        for systematic in systematics
+        if systematic == "NOSYS"
+        or (
+            (
+                include is None
+                or any(fnmatch.fnmatchcase(systematic, p) for p in include)
+            )
+            and not any(fnmatch.fnmatchcase(systematic, p) for p in exclude)
+        )
+    }
+
+
+def align_branches(
+    base_form: dict[str, Any],
+    branches: dict[str, dict[str, Any]],
+    optional: Collection[str] = (),
+) -> dict[str, Any]:
+    """Replace the branches of *base_form* with *branches*.
+
+    Branches of the file that are not listed are dropped. The *optional*
+    branches, and listed branches the file does not have, get an option-typed
+    form. A systematic variation the file does not have reads its nominal
+    (``_NOSYS``) branch instead. Other missing branches read missing values,
+    shaped like the jagged branch of the file sharing the most ``_``-separated
+    leading tokens with it, or as empty lists if there is none.
+    """
+    present = dict(zip(base_form["fields"], base_form["contents"]))
+    # leading tokens of jagged branches -> form key of the first such branch
+    siblings: dict[tuple[str, ...], str] = {}
+    for name, form in present.items():
+        if form["class"].startswith("ListOffset"):
+            tokens = tuple(name.split("_"))
+            for end in range(1, len(tokens)):
+                siblings.setdefault(tokens[:end], form["form_key"])
+
+    fields, contents = [], []
+    for name, template in branches.items():
+        form = present.get(name)
+        if form is not None and name not in optional:
+            fields.append(name)
+            contents.append(form)
+            continue
+        offsets_key = None
+        if form is None:
+            form = _nominal_stand_in(name, template, present)
+        if form is None and template["class"].startswith("ListOffset"):
+            tokens = tuple(name.split("_"))
+            offsets_key = next(
+                (
+                    siblings[tokens[:end]]
+                    for end in range(len(tokens) - 1, 0, -1)
+                    if tokens[:end] in siblings
+                ),
+                None,
+            )
+        fields.append(name)
+        contents.append(
+            transforms.optional_form(template, form, name=name, offsets_key=offsets_key)
+        )
+    return {**base_form, "fields": fields, "contents": contents}
+
+
+def _nominal_stand_in(
+    name: str, template: dict[str, Any], present: dict[str, dict[str, Any]]
+) -> dict[str, Any] | None:
+    """Form of the nominal branch to read for a missing systematic variation *name*, if the file has one of the same type."""
+
+    def primitive(form: dict[str, Any]) -> Any:
+        return form.get("primitive", form.get("content", {}).get("primitive"))
+
+    pos = name.rfind("_")
+    while pos != -1:
+        nominal = present.get(f"{name[:pos]}_NOSYS")
+        if nominal is not None:
+            same_type = nominal["class"] == template["class"] and primitive(
+                nominal
+            ) == primitive(template)
+            return nominal if same_type else None
+        pos = name.rfind("_", 0, pos)
+    return None
+
+
+def resolve_collections(
+    branch_forms: dict[str, Any],
+    mixins: Iterable[str],
+    singletons: Collection[str],
+    event_ids: Collection[str],
+) -> set[str]:
+    """Resolve the collection of every branch in a single walk over its name.
+
+    The *mixins* are arranged in a prefix trie over the ``_``-separated tokens
+    of their names, and each branch belongs to the longest mixin it is prefixed
+    by (``{mixin}_``), or else to its first token. Collections with
+    underscores, such as ``recojet_antikt4PFlow``, can thus only be found
+    through the mixins.
+
+    Returns:
+        set: names of the collections, without *event_ids* and *singletons*
+    """
+    mixins = list(mixins)
+    # token -> (sub-trie, mixin name ending at this token or None)
+    trie: dict[str, Any] = {}
+    for mixin in mixins:
+        node = trie
+        *parents, last = mixin.split("_")
+        for token in parents:
+            node = node.setdefault(token, ({}, None))[0]
+        children = node.get(last, ({}, None))[0]
+        node[last] = (children, mixin)
+
+    collections = set()
+    # first token of branches resolved to a longer mixin
+    prefixes = set()
+    for k in branch_forms:
+        if k in singletons:
+            continue
+        tokens = k.split("_")
+        collection = tokens[0]
+        node = trie
+        # a mixin is only a collection if the branch continues after it
+        for token in tokens[:-1]:
+            if token not in node:
+                break
+            node, mixin = node[token]
+            if mixin is not None:
+                collection = mixin
+        if collection != tokens[0]:
+            prefixes.add(tokens[0])
+        collections.add(collection)
+
+    for mixin in mixins:
+        if "_" in mixin and mixin in collections:
+            warnings.warn(
+                f"I identified a mixin that I did not automatically identify as a collection because it contained an underscore: '{mixin}'. I will add this to the known collections. To suppress this warning next time, please create your ntuples with collections without underscores. [mixin-underscore]",
+                RuntimeWarning,
+                stacklevel=3,
+            )
+    for collection in sorted(prefixes - collections):
+        warnings.warn(
+            f"I found a misidentified collection: '{collection}'. I will remove this from the known collections. To suppress this warning next time, please create your ntuples with collections that are not similarly named with underscores. [collection-subset]",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+
+    collections -= set(event_ids)
+    collections -= set(singletons)
+    return collections
+
+
+def index_branches(
+    branch_forms: dict[str, Any],
+    collections: set[str],
+    subcollections: set[str],
+) -> BranchIndex:
+    """Tokenize every branch name once against the known collections and subcollections.
+
+    A branch belongs to the longest collection it is prefixed by
+    (``{collection}_``), as resolved by :func:`resolve_collections`. The
+    remainder of the branch name is kept along with every way of splitting it
+    as ``{subcollection}_{systematic}`` for a known subcollection, longest
+    subcollection first.
+
+    Returns:
+        dict: branch name to a list of ``(collection, remainder, [(subcollection, systematic), ...])``, omitting branches that belong to no collection
+    """
+    index = {}
+    for k in branch_forms:
+        entries: list[tuple[str, str, list[tuple[str, str]]]] = []
+        pos = k.rfind("_")
+        while pos != -1 and not entries:
+            if k[:pos] in collections:
+                remainder = k[pos + 1 :]
+                splits = []
+                cut = remainder.rfind("_")
+                while cut != -1:
+                    if remainder[:cut] in subcollections:
+                        splits.append((remainder[:cut], remainder[cut + 1 :]))
+                    cut = remainder.rfind("_", 0, cut)
+                entries.append((k[:pos], remainder, splits))
+            pos = k.rfind("_", 0, pos)
+        if entries:
+            index[k] = entries
+    return index
+
+
+def classify_nominal(
+    branch_forms: dict[str, Any],
+    collections: set[str],
+    subcollections: set[str],
+    nosys_fields: dict[str, dict[str, Any]],
+    plain_fields: dict[str, dict[str, Any]],
+) -> dict[str, str]:
+    """Classify the branches of a nominal-only build, without discovering systematics.
+
+    A branch ``{collection}_{subcollection}_{suffix}`` of a known subcollection
+    is a systematic variation, and left out, unless the suffix is ``NOSYS``.
+    The nominal and plain fields are added to *nosys_fields* and *plain_fields*
+    as in a full build.
+
+    Returns:
+        dict: collection of every branch belonging to one, in order of the branches
+    """
+    members = {}
+    for k, form in branch_forms.items():
+        pos = k.rfind("_")
+        while pos != -1 and k[:pos] not in collections:
+            pos = k.rfind("_", 0, pos)
+        if pos == -1:
+            continue
+        collection_name, remainder = k[:pos], k[pos + 1 :]
+        members[k] = collection_name
+        if "_NOSYS" in k:
+            subname = remainder[: -len("_NOSYS")]
+            if remainder.endswith("_NOSYS") and subname in subcollections:
+                nosys_fields.setdefault(collection_name, {})[subname] = form
+            continue
+        cut = remainder.rfind("_")
+        while cut != -1 and remainder[:cut] not in subcollections:
+            cut = remainder.rfind("_", 0, cut)
+        if cut == -1:
+            plain_fields.setdefault(collection_name, {}).setdefault(remainder, form)
+    return members
+
+
+def discover_systematics(index: BranchIndex, singletons: Collection[str]) -> set[str]:
+    """Extract the systematic variations from the *index* of the branch names.
+
+    Only branches of a leading (underscore-free) collection name are
+    considered, and the longest known subcollection wins when several would
+    match, see :func:`index_branches`.
+
+    Returns:
+        set: all systematic variation names found in the branches, and ``NOSYS``
+    """
+    all_systematics = set()
+    for k, entries in index.items():
+        if k in singletons:
+            continue
+        # only the leading (underscore-free) collection name is considered
+        collection, _, splits = entries[0]
+        if not splits or collection != k.split("_", 1)[0]:
+            continue
+        systematic = splits[0][1]
+        if systematic and systematic != "NOSYS":
+            all_systematics.add(systematic)
+
+    # Always include NOSYS as the nominal case
+    all_systematics.add("NOSYS")
+    return all_systematics
+
+
+@functools.lru_cache(maxsize=8)
+def _lowercase(behaviors: tuple[str, ...]) -> list[str]:
+    """Lowercase versions of the *behaviors*, for case-insensitive matching."""
+    return [b.lower() for b in behaviors]
+
+
+@functools.lru_cache(maxsize=4096)
+def closest_behavior(
+    key: str, cutoff: float, behaviors: tuple[str, ...], similarity: str
+) -> str | None:
+    """Name of the behavior closest to *key*, or ``None`` if none scores above *cutoff*."""
+    behaviors_l = _lowercase(behaviors)
+    if similarity == "rapidfuzz":
+        from rapidfuzz import fuzz, process  # noqa: PLC0415  # pylint: disable=import-outside-toplevel
+
+        match = process.extractOne(
+            key.lower(), behaviors_l, scorer=fuzz.ratio, score_cutoff=cutoff * 100
+        )
+        return None if match is None else behaviors[match[2]]
+
+    results = difflib.get_close_matches(key.lower(), behaviors_l, n=1, cutoff=cutoff)
+    if not results:
+        return None
+
+    # need to identify the index and return the unlowered version
+    return behaviors[behaviors_l.index(results[0])]
+
+
+__all__ = [
+    "BranchIndex",
+    "align_branches",
+    "classify_nominal",
+    "closest_behavior",
+    "discover_systematics",
+    "filter_branches",
+    "glob_matcher",
+    "index_branches",
+    "resolve_collections",
+    "select_systematics",
+]
@@ -0,0 +1,123 @@
+"""On-disk cache of built :class:`~atlas_schema.schema.NtupleSchema` forms.
+
+Files in a dataset typically share an identical list of branches, so the form
+built for one of them can be reused for all others. Entries are stored as JSON
+files named after a fingerprint of the inputs, and the least recently used
+entries are evicted once the cache directory grows beyond a size bound.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+
+def _encode(obj: Any) -> Any:
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=repr)
+    msg = f"Object of type {type(obj).__name__} is not JSON serializable"
+    raise TypeError(msg)
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Compute a stable fingerprint of JSON-serializable objects.
+
+    Sets are sorted and dictionary keys are ordered, so the fingerprint does not
+    depend on hash randomization.
+
+    Args:
+        parts: objects to fingerprint together
+
+    Returns:
+        str: hexadecimal SHA-256 digest
+
+    Example:
+        >>> from atlas_schema.cache import fingerprint
+        >>> fingerprint({"b", "a"}) == fingerprint({"a", "b"})
+        True
+    """
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=_encode)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class FormCache:
+    """
+    Size-bounded, least-recently-used cache of JSON documents in a local directory.
+
+    Writes are atomic, so several processes can share the same directory.
+
+    Args:
+        directory (str | os.PathLike): directory holding the cache entries (created on first write)
+        max_bytes (int): total size of all entries after which least recently used ones are evicted
+    """
+
+    suffix = ".json"
+
+    def __init__(self, directory: str | os.PathLike[str], max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Any | None:
+        """Return the entry stored under *key*, or ``None`` if there is none."""
+        path = self._path(key)
+        try:
+            with path.open(encoding="utf-8") as fp:
+                value = json.load(fp)
+        except (OSError, ValueError):
+            return None
+        # mark as recently used
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store *value* under *key* and evict old entries if needed."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fp:
+                json.dump(value, fp, separators=(",", ":"))
+            Path(tmp).replace(self._path(key))
+        except BaseException:
+            with contextlib.suppress(OSError):
+                Path(tmp).unlink()
+            raise
+        self.evict()
+
+    def entries(self) -> list[tuple[float, int, Path]]:
+        """List ``(mtime, size, path)`` of all entries, least recently used first."""
+        entries = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            with contextlib.suppress(FileNotFoundError):
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in :attr:`max_bytes`."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                path.unlink()
+            total -= size
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        for _, _, path in self.entries():
+            with contextlib.suppress(FileNotFoundError):
+                path.unlink()
+
+
+__all__ = ["FormCache", "fingerprint"]
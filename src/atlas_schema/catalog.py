@@ -0,0 +1,309 @@
+"""Catalog of the branches and systematics of a dataset, before processing it.
+
+:func:`build_catalog` reads only the branch names and types of the tree in each
+file, without reading any baskets, and builds the
+:class:`~atlas_schema.schema.NtupleSchema` of each file in a pool of
+processes. The resulting :class:`Catalog` answers questions such as which
+systematics every file provides, which files miss event IDs, and whether all
+files share the same branches, and can be saved as JSON.
+
+If the schema class sets :attr:`~atlas_schema.schema.NtupleSchema.cache_dir`,
+building the catalog also fills the cache with the form of every distinct
+branch set, so that processing the dataset afterwards does not build them
+again.
+
+.. code-block:: python
+
+    from atlas_schema.catalog import build_catalog
+
+    catalog = build_catalog(sorted(Path("data").glob("*.root")), treepath="reco")
+    catalog.systematics(common=True)
+    catalog.missing_event_ids()
+    catalog.save("catalog.json")
+"""
+
+from __future__ import annotations
+
+import copy
+import functools
+import json
+import os
+import warnings
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Literal
+
+import uproot
+from coffea.nanoevents.mapping import UprootSourceMapping
+
+from atlas_schema.cache import fingerprint
+from atlas_schema.schema import NtupleSchema
+
+
+def _base_form(tree: Any) -> dict[str, Any]:
+    """
+    Form of the branches of *tree*, as handed to the schema by NanoEvents.
+
+    coffea has no public API to build this form without building the events
+    as well, which would read (or at least plan to read) the branches. The
+    catalog only needs the form, so this is the one place relying on the
+    private helper of :class:`~coffea.nanoevents.mapping.UprootSourceMapping`.
+    """
+    form: dict[str, Any] = UprootSourceMapping._extract_base_form(tree)  # pylint: disable=protected-access
+    return form
+
+
+def scan_file(
+    path: str | os.PathLike[str],
+    treepath: str = "reco",
+    schemaclass: type[NtupleSchema] = NtupleSchema,
+) -> dict[str, Any]:
+    """
+    Catalog the branches and systematics of a single file.
+
+    Args:
+        path (str | os.PathLike): path of the ROOT file
+        treepath (str): name of the tree in the file
+        schemaclass (type[NtupleSchema]): schema to build for the branches of the file
+
+    Returns:
+        dict: entry of :attr:`Catalog.files`, with ``branches`` holding the sorted branch names and ``forms`` their forms, or an ``error`` if the file could not be read or its schema could not be built
+    """
+    entry: dict[str, Any] = {"path": os.fspath(path), "treepath": treepath}
+    try:
+        with uproot.open(path) as file:
+            tree = file[treepath]
+            entry["entries"] = tree.num_entries
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                base_form = _base_form(tree)
+                branches = sorted(base_form["fields"])
+                # the schema takes over the forms of the branches, so keep a copy
+                forms = copy.deepcopy(
+                    dict(zip(base_form["fields"], base_form["contents"]))
+                )
+                metadata = schemaclass(base_form).form["parameters"]["metadata"]
+    except (OSError, KeyError, ValueError, RuntimeError) as exc:
+        entry["error"] = f"{type(exc).__name__}: {exc}"
+        return entry
+
+    entry.update(
+        {
+            "branches": branches,
+            "forms": forms,
+            "systematics": metadata["systematics"],
+            "collections": metadata["collections"],
+            "missing_event_ids": sorted(schemaclass.event_ids.difference(branches)),
+            "missing_singletons": sorted(
+                set(schemaclass.singletons).difference(branches)
+            ),
+            "diagnostics": metadata.get("diagnostics", {}),
+        }
+    )
+    return entry
+
+
+def build_catalog(
+    paths: Iterable[str | os.PathLike[str]],
+    treepath: str = "reco",
+    schemaclass: type[NtupleSchema] = NtupleSchema,
+    max_workers: int | None = None,
+) -> Catalog:
+    """
+    Catalog the branches and systematics of many files in parallel.
+
+    Args:
+        paths (Iterable[str | os.PathLike]): paths of the ROOT files
+        treepath (str): name of the tree in each file
+        schemaclass (type[NtupleSchema]): schema to build for the branches of each file, which must be importable by the worker processes (defined at module level, or derived from such a schema by its factories)
+        max_workers (int | None): number of processes, ``None`` for one per CPU, or ``1`` to scan in the current process
+
+    Returns:
+        Catalog: one entry per file, in the order of *paths*
+    """
+    paths = list(paths)
+    scan = functools.partial(scan_file, treepath=treepath, schemaclass=schemaclass)
+    if max_workers == 1 or len(paths) <= 1:
+        entries = [scan(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            entries = list(executor.map(scan, paths))
+    return Catalog.from_entries(entries)
+
+
+class Catalog:
+    """
+    Branches and systematics of the files of a dataset.
+
+    Branch names are stored once per distinct set of branches, which files
+    refer to by the fingerprint of their set, and branch forms once per branch.
+
+    Args:
+        files (list[dict]): one entry per file, as returned by :func:`scan_file` with ``branches`` replaced by ``branch_set`` and without ``forms``
+        branch_sets (dict[str, list[str]]): sorted branch names of each branch set fingerprint
+        branch_forms (dict[str, dict]): form of each branch, from the first file that has it
+    """
+
+    def __init__(
+        self,
+        files: list[dict[str, Any]],
+        branch_sets: dict[str, list[str]],
+        branch_forms: dict[str, dict[str, Any]] | None = None,
+    ) -> None:
+        #: one entry per file
+        self.files = files
+        #: sorted branch names of each distinct set of branches
+        self.branch_sets = branch_sets
+        #: form of each branch, in order of first appearance
+        self.branch_forms = branch_forms if branch_forms is not None else {}
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[dict[str, Any]]) -> Catalog:
+        """Build a catalog from the results of :func:`scan_file`."""
+        files = []
+        branch_sets: dict[str, list[str]] = {}
+        branch_forms: dict[str, dict[str, Any]] = {}
+        for scanned in entries:
+            entry = dict(scanned)
+            for name, form in entry.pop("forms", {}).items():
+                branch_forms.setdefault(name, form)
+            branches = entry.pop("branches", None)
+            if branches is not None:
+                key = fingerprint(branches)
+                branch_sets.setdefault(key, branches)
+                entry["branch_set"] = key
+            files.append(entry)
+        return cls(files, branch_sets, branch_forms)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(files={len(self.files)}, branch_sets={len(self.branch_sets)}, errors={len(self.errors())})"
+
+    def _scanned(self) -> list[dict[str, Any]]:
+        return [entry for entry in self.files if "error" not in entry]
+
+    def errors(self) -> dict[str, str]:
+        """Error of each file that could not be scanned."""
+        return {
+            entry["path"]: entry["error"] for entry in self.files if "error" in entry
+        }
+
+    def systematics(self, common: bool = False) -> list[str]:
+        """
+        Systematics found in the dataset.
+
+        Args:
+            common (bool): only keep the systematics found in every scanned file, instead of in any of them
+
+        Returns:
+            list[str]: sorted names of the systematics
+        """
+        sets = [set(entry["systematics"]) for entry in self._scanned()]
+        if not sets:
+            return []
+        return sorted(set.intersection(*sets) if common else set.union(*sets))
+
+    def files_with_systematic(self, systematic: str) -> list[str]:
+        """Paths of the files providing *systematic*."""
+        return [
+            entry["path"]
+            for entry in self._scanned()
+            if systematic in entry["systematics"]
+        ]
+
+    def missing_event_ids(self) -> dict[str, list[str]]:
+        """Missing event IDs of each file that misses any."""
+        return {
+            entry["path"]: entry["missing_event_ids"]
+            for entry in self._scanned()
+            if entry["missing_event_ids"]
+        }
+
+    def groups(self) -> dict[str, list[str]]:
+        """Paths of the files sharing each set of branches, keyed by its fingerprint."""
+        groups: dict[str, list[str]] = {key: [] for key in self.branch_sets}
+        for entry in self._scanned():
+            groups[entry["branch_set"]].append(entry["path"])
+        return groups
+
+    def is_homogeneous(self) -> bool:
+        """Whether all scanned files share the same set of branches."""
+        return len(self.branch_sets) <= 1
+
+    def heterogeneous_branches(self) -> dict[str, list[str]]:
+        """
+        Branches missing from some of the files.
+
+        Returns:
+            dict[str, list[str]]: paths of the files lacking each branch that is not in every file
+        """
+        groups = self.groups()
+        sets = {key: set(branches) for key, branches in self.branch_sets.items()}
+        every = set.union(*sets.values()) if sets else set()
+        common = set.intersection(*sets.values()) if sets else set()
+        return {
+            branch: [
+                path
+                for key, paths in groups.items()
+                if branch not in sets[key]
+                for path in paths
+            ]
+            for branch in sorted(every - common)
+        }
+
+    def schema(
+        self,
+        mode: Literal["union", "intersection"] = "union",
+        schemaclass: type[NtupleSchema] = NtupleSchema,
+    ) -> type[NtupleSchema]:
+        """
+        Schema building every file of the dataset from the same branches.
+
+        Args:
+            mode (str): ``"union"`` to fill in the branches a file does not have with missing values, or ``"intersection"`` to drop the branches some files do not have
+            schemaclass (type[NtupleSchema]): schema to derive from
+
+        Returns:
+            type[NtupleSchema]: subclass of *schemaclass*, see :meth:`~atlas_schema.schema.NtupleSchema.with_branches`
+        """
+        if mode not in {"union", "intersection"}:
+            msg = f"Unknown mode '{mode}', expected 'union' or 'intersection'"
+            raise ValueError(msg)
+        sets = [set(branches) for branches in self.branch_sets.values()]
+        common = set.intersection(*sets) if sets else set()
+        if mode == "intersection":
+            branches = {
+                name: form for name, form in self.branch_forms.items() if name in common
+            }
+            return schemaclass.with_branches(branches)
+        return schemaclass.with_branches(
+            self.branch_forms, optional=set(self.branch_forms) - common
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serializable content of the catalog."""
+        return {
+            "files": self.files,
+            "branch_sets": self.branch_sets,
+            "branch_forms": self.branch_forms,
+        }
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """Write the catalog as JSON to *path*."""
+        with Path(path).open("w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle, indent=1)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> Catalog:
+        """Read a catalog written by :meth:`save`."""
+        with Path(path).open(encoding="utf-8") as handle:
+            content = json.load(handle)
+        return cls(
+            content["files"], content["branch_sets"], content.get("branch_forms")
+        )
+
+
+__all__ = ["Catalog", "build_catalog", "scan_file"]
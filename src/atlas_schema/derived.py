@@ -0,0 +1,62 @@
+"""Schemas derived on the fly by the factories of :class:`~atlas_schema.schema.NtupleSchema`.
+
+Factories such as :meth:`~atlas_schema.schema.NtupleSchema.with_systematics`
+return a new subclass with a few settings changed. Such classes cannot be
+found by name, so they are pickled (for instance when sent to the worker
+processes of :func:`~atlas_schema.catalog.build_catalog`) as the factory call
+that built them, and built again by the same call when unpickled.
+"""
+
+from __future__ import annotations
+
+import copyreg
+from typing import Any
+
+
+class DerivedSchema(type):
+    """Metaclass of the schemas derived by a factory, see :func:`derive`."""
+
+
+def derive(
+    cls: type, factory: str, args: tuple[Any, ...], namespace: dict[str, Any]
+) -> Any:
+    """
+    Derive a schema from *cls* that is rebuilt by ``cls.<factory>(*args)`` when unpickled.
+
+    Args:
+        cls (type): schema to derive from
+        factory (str): name of the classmethod of *cls* deriving the schema
+        args (tuple): picklable arguments of the *factory*
+        namespace (dict): settings of the derived schema
+
+    Returns:
+        type: subclass of *cls*, with the same name
+    """
+    return DerivedSchema(
+        cls.__name__,
+        (cls,),
+        {
+            "__module__": cls.__module__,
+            "__qualname__": cls.__qualname__,
+            "_derived_from": (cls, factory, args),
+            **namespace,
+        },
+    )
+
+
+def _rebuild(cls: type, factory: str, args: tuple[Any, ...]) -> type:
+    """Call the factory that derived a schema, see :func:`derive`."""
+    derived: type = getattr(cls, factory)(*args)
+    return derived
+
+
+def _reduce(cls: type) -> str | tuple[Any, ...]:
+    # classes defined by users on top of a derived schema are found by name
+    if "_derived_from" not in cls.__dict__:
+        return cls.__qualname__
+    return _rebuild, cls.__dict__["_derived_from"]
+
+
+copyreg.pickle(DerivedSchema, _reduce)
+
+__all__ = ["DerivedSchema", "derive"]
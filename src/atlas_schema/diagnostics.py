@@ -0,0 +1,77 @@
+"""Warnings of :class:`~atlas_schema.schema.NtupleSchema` builds, grouped by category.
+
+Ntuples with many unexpected branches would otherwise raise one warning per
+branch or collection, and once more for every systematic variation. The
+schema instead collects them in :class:`Diagnostics`, counting each item once,
+and raises a single summary warning per category at the end of the build. The
+full lists are kept in the form metadata (``events.metadata["diagnostics"]``).
+"""
+
+from __future__ import annotations
+
+import warnings
+
+#: number of items quoted in a summary warning
+MAX_LISTED = 10
+
+
+class Diagnostics:
+    """
+    Warnings of a schema build, grouped by category and counted once per item.
+
+    Categories are the tags that end the warning messages, such as
+    ``singleton-undefined``.
+
+    Example:
+        >>> from atlas_schema.diagnostics import Diagnostics
+        >>> diagnostics = Diagnostics()
+        >>> for branch in ["a", "b", "a"]:
+        ...     diagnostics.add(
+        ...         "singleton-undefined",
+        ...         branch,
+        ...         f"Unknown branch: '{branch}'. [singleton-undefined]",
+        ...     )
+        >>> diagnostics.to_dict()
+        {'singleton-undefined': ['a', 'b']}
+        >>> diagnostics.summary("singleton-undefined")
+        "Unknown branch: 'a'. (1 more like this: 'b') [singleton-undefined]"
+    """
+
+    def __init__(self) -> None:
+        # category -> item -> message of its first occurrence
+        self._messages: dict[str, dict[str, str]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._messages.values())
+
+    def add(self, category: str, item: str, message: str) -> None:
+        """Record *message* about *item*, unless the item was already recorded in *category*."""
+        self._messages.setdefault(category, {}).setdefault(item, message)
+
+    def to_dict(self) -> dict[str, list[str]]:
+        """Items of each category, in order of first occurrence."""
+        return {category: list(items) for category, items in self._messages.items()}
+
+    def summary(self, category: str) -> str:
+        """Message of the first item of *category*, listing how many other items there are."""
+        items = self._messages[category]
+        first, *others = items
+        message = items[first]
+        if not others:
+            return message
+        tag = f" [{category}]"
+        message = message.removesuffix(tag)
+        listed = ", ".join(repr(item) for item in others[:MAX_LISTED])
+        if len(others) > MAX_LISTED:
+            listed += ", ..."
+        return f"{message} ({len(others)} more like this: {listed}){tag}"
+
+    def warn(self, stacklevel: int = 2) -> None:
+        """Raise one :class:`RuntimeWarning` per category with its :meth:`summary`."""
+        for category in self._messages:
+            warnings.warn(
+                self.summary(category), RuntimeWarning, stacklevel=stacklevel + 1
+            )
+
+
+__all__ = ["Diagnostics"]
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
 import sys
+from collections.abc import Callable, Iterable, Mapping, Sequence
 from enum import Enum, IntEnum
+from functools import cache, reduce
+from operator import ior
+from typing import TypeVar, cast
+
+import numpy as np
+
+from atlas_schema.utils import Array, _lookup
 
 if sys.version_info >= (3, 11):
     from enum import EnumType
 else:
     from enum import EnumMeta as EnumType
 
-from typing import Callable, TypeVar, cast
-
 _E = TypeVar("_E", bound=Enum)
 
 
@@ -25,7 +31,115 @@ class MultipleEnumAccessMeta(EnumType):
         return getitem(key)
 
 
-class ParticleType(IntEnum, metaclass=MultipleEnumAccessMeta):
+class ClassificationEnum(IntEnum, metaclass=MultipleEnumAccessMeta):
+    """
+    Integer enum with vectorized classification of arrays of its values.
+
+    Lookup tables indexed by value are built once per request and cached, so
+    that classifying an array is a single gather on its flat content,
+    regardless of the number of members or categories asked for.
+    """
+
+    @classmethod
+    def member(cls, member: str | int) -> ClassificationEnum:
+        """
+        Look up a member by name or by value.
+
+        Args:
+            member (str | int): name or value of the member
+
+        Returns:
+            ClassificationEnum: the member
+
+        Example:
+            >>> from atlas_schema.enums import ParticleOrigin
+            >>> ParticleOrigin.member("WBoson") is ParticleOrigin.member(12)
+            True
+        """
+        return cast(
+            ClassificationEnum, cls[member] if isinstance(member, str) else cls(member)
+        )
+
+    @classmethod
+    @cache
+    def _table(
+        cls, categories: tuple[frozenset[ClassificationEnum], ...] | None, default: int
+    ) -> np.ndarray:
+        table = np.full(max(cls) + 1, default, dtype=np.int64)
+        if categories is None:
+            for member in cls:
+                table[member] = member
+        else:
+            # the first category holding a member wins
+            for index, members in reversed(list(enumerate(categories))):
+                table[list(members)] = index
+        table.setflags(write=False)
+        return table
+
+    @classmethod
+    def mask(cls, array: Array, *members: str | int) -> Array:
+        """
+        Find which values of *array* are any of *members*.
+
+        Args:
+            array (ak.Array | dask_awkward.Array): integer values of this enum
+            members (str | int): members, or their names
+
+        Returns:
+            ak.Array | dask_awkward.Array: boolean array of the same shape as *array*
+
+        Example:
+            >>> import awkward as ak
+            >>> from atlas_schema.enums import ParticleOrigin
+            >>> origins = ak.Array([[12, 13, 26], [], [14]])
+            >>> ParticleOrigin.mask(origins, "WBoson", "ZBoson").to_list()
+            [[True, True, False], [], [False]]
+        """
+        table = cls._table((frozenset(cls.member(m) for m in members),), -1)
+        return _lookup(table == 0, False, array)
+
+    @classmethod
+    def category(
+        cls,
+        array: Array,
+        categories: Sequence[Iterable[str | int]]
+        | Mapping[str, Iterable[str | int]]
+        | None = None,
+        default: int = -1,
+    ) -> Array:
+        """
+        Classify the values of *array* into categories of members.
+
+        Args:
+            array (ak.Array | dask_awkward.Array): integer values of this enum
+            categories (Sequence | Mapping | None): members (or their names) in each category. If a mapping is given, categories are numbered in the order of its keys. If ``None``, each member is its own category, numbered by its value.
+            default (int): category of values that are in none of the categories (or not a member)
+
+        Returns:
+            ak.Array | dask_awkward.Array: index of the first category holding each value
+
+        Example:
+            >>> import awkward as ak
+            >>> from atlas_schema.enums import ParticleOrigin
+            >>> origins = ak.Array([[12, 13, 26], [], [14, 99]])
+            >>> ParticleOrigin.category(
+            ...     origins, {"boson": ["WBoson", "ZBoson"], "b": ["BottomMeson"]}
+            ... ).to_list()
+            [[0, 0, 1], [], [-1, -1]]
+            >>> ParticleOrigin.category(origins).to_list()
+            [[12, 13, 26], [], [14, -1]]
+        """
+        if categories is not None:
+            if isinstance(categories, Mapping):
+                categories = list(categories.values())
+            key = tuple(
+                frozenset(cls.member(m) for m in members) for members in categories
+            )
+            return _lookup(cls._table(key, default), default, array)
+        return _lookup(cls._table(None, default), default, array)
+
+
+class ParticleType(ClassificationEnum):
     """
     Taken from `ATLAS Truth Utilities for ParticleType <https://gitlab.cern.ch/atlas/athena/-/blob/74f43ff0910edb2a2bd3778880ccbdad648dc037/Generators/TruthUtils/TruthUtils/TruthClasses.h#L8-49>`_.
     """
@@ -72,7 +186,7 @@ class ParticleType(IntEnum, metaclass=MultipleEnumAccessMeta):
     UnknownJet = 38
 
 
-class ParticleOrigin(IntEnum, metaclass=MultipleEnumAccessMeta):
+class ParticleOrigin(ClassificationEnum):
     """
     Taken from `ATLAS Truth Utilities for ParticleOrigin <https://gitlab.cern.ch/atlas/athena/-/blob/74f43ff0910edb2a2bd3778880ccbdad648dc037/Generators/TruthUtils/TruthUtils/TruthClasses.h#L51-103>`_.
     """
@@ -143,3 +257,34 @@ class PhotonID(IntEnum, metaclass=MultipleEnumAccessMeta):
     fside = 19  # ClusterStripsFracm_Photon
     Ws3 = 20  # ClusterStripsWeta1c_Photon
     ERatio = 21  # ClusterStripsDEmaxs1_Photon
+
+    @classmethod
+    def mask(cls, words: Iterable[PhotonID | str]) -> int:
+        """
+        Compile isEM words into the integer mask of their bits.
+
+        Masks are cached per set of words, so repeated working point queries
+        only build them once.
+
+        Args:
+            words (Iterable[PhotonID | str]): isEM words, or their names
+
+        Returns:
+            int: bitmask with the bits of all *words* set
+
+        Example:
+            >>> from atlas_schema.enums import PhotonID
+            >>> PhotonID.mask([PhotonID.Rhad, "Reta"]) == (1 << 10) | (1 << 12)
+            True
+        """
+        return _compile_mask(
+            frozenset(
+                cast(PhotonID, cls[word]) if isinstance(word, str) else word
+                for word in words
+            )
+        )
+
+
+@cache
+def _compile_mask(words: frozenset[PhotonID]) -> int:
+    return reduce(ior, (1 << word.value for word in words), 0)
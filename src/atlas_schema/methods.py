@@ -2,20 +2,320 @@
 
 from __future__ import annotations
 
-from functools import reduce
-from operator import ior
+import sys
+import weakref
+from collections.abc import Iterable, Iterator, Mapping
+from contextvars import ContextVar
+from typing import Any
 
 import awkward
+import numpy as np
 from coffea.nanoevents.methods import base, candidate, vector
 
 from atlas_schema.enums import PhotonID
 from atlas_schema.typing_compat import Behavior
+from atlas_schema.utils import _bits_clear
 
 behavior: Behavior = {}
 behavior.update(base.behavior)
 # vector behavior is included in candidate behavior
 behavior.update(candidate.behavior)
 
+#: top-level fields requested from the nominal events while tracing the inputs of a function
+_accessed_fields: ContextVar[set[str] | None] = ContextVar(
+    "_accessed_fields", default=None
+)
+#: transient attribute of the events holding weak references to the collections built by the schema
+_SCHEMA_COLLECTIONS = "@schema_collections"
+
+
+def _array_library(array):
+    """Return the module (:mod:`awkward` or :mod:`dask_awkward`) handling *array*."""
+    if type(array).__module__.startswith("dask_awkward"):
+        import dask_awkward  # noqa: PLC0415  # pylint: disable=import-outside-toplevel
+
+        return dask_awkward
+    return awkward
+
+
+def _event_fields(layout):
+    """Split an events *layout* into its record of fields and the event selection applied to it."""
+    if isinstance(layout, awkward.contents.IndexedArray) and isinstance(
+        layout.content, awkward.contents.RecordArray
+    ):
+        return layout.content, layout.index
+    return layout, None
+
+
+def _field(record, name):
+    """Return the content of the field *name* of the *record* layout, or ``None``."""
+    if not record.has_field(name):
+        return None
+    return record.contents[record.field_to_index(name)]
+
+
+def _schema_collection(events, fields, collection):
+    """Return the *collection* of the *fields* layout if it is still the one built by the schema.
+
+    Collections reassigned since (sorted, filtered, or replaced altogether)
+    no longer line up with the fields stored for the systematic variations,
+    so ``None`` is returned for those. Slicing a range of events keeps the
+    contents of a jagged collection, so it still counts as built by the
+    schema.
+    """
+    reference = (events.attrs or {}).get(_SCHEMA_COLLECTIONS, {}).get(collection)
+    content = _field(fields, collection)
+    original = None if reference is None else reference()
+    if content is None or original is None:
+        return None
+    if content is original:
+        return content
+    if (
+        isinstance(content, awkward.contents.ListOffsetArray)
+        and isinstance(original, awkward.contents.ListOffsetArray)
+        and content.content is original.content
+    ):
+        return content
+    return None
+
+
+def _overlay_fields(nominal, varied, fields):
+    """Replace *fields* of the *nominal* collection layout by those of the *varied* collection layout."""
+    nominal_record, varied_record = nominal, varied
+    if isinstance(nominal, awkward.contents.ListOffsetArray) and isinstance(
+        varied, awkward.contents.ListOffsetArray
+    ):
+        nominal_record, varied_record = nominal.content, varied.content
+    if isinstance(nominal_record, awkward.contents.RecordArray) and isinstance(
+        varied_record, awkward.contents.RecordArray
+    ):
+        # splice the varied contents under the nominal offsets directly,
+        # without reading (or comparing) the offsets of the variation
+        contents = dict(zip(nominal_record.fields, nominal_record.contents))
+        for field in fields:
+            contents[field] = _field(varied_record, field)
+        record = awkward.contents.RecordArray(
+            list(contents.values()),
+            list(contents),
+            length=nominal_record.length,
+            parameters=nominal_record.parameters,
+        )
+        return record if nominal_record is nominal else nominal.copy(content=record)
+    for field in fields:
+        nominal = awkward.with_field(nominal, varied[field], field, highlevel=False)
+    return nominal
+
+
+def _assemble_systematic(events, systematic, record=None):
+    """Lay the varied fields of *systematic* over the nominal collections of the (eager or virtual) *events*.
+
+    Only the collections that *systematic* varies are assembled; the others
+    are the nominal collections, or the collections stored in the systematic
+    *record* (by default, the field *systematic* of *events*). Unvaried
+    fields, as well as the offsets, are taken from the nominal collections,
+    so they share the same buffers. Everything happens on layouts, so no
+    collection is validated (or read) until it is accessed.
+
+    Raises:
+        ValueError: if a collection varied by a systematic built with :attr:`~atlas_schema.schema.NtupleSchema.lazy_systematics` was reassigned in *events*
+    """
+    metadata = events.layout.purelist_parameter("metadata") or {}
+    varied = metadata.get("varied", {}).get(systematic, {})
+    fields, index = _event_fields(events.layout)
+    if record is None:
+        record = _field(fields, systematic)
+
+    contents = {}
+    for collection in [*metadata.get("collections", []), *record.fields]:
+        if collection in contents:
+            continue
+        nominal = _schema_collection(events, fields, collection)
+        stored = _field(record, collection)
+        if nominal is not None:
+            contents[collection] = (
+                _overlay_fields(nominal, stored, varied[collection])
+                if varied.get(collection)
+                else nominal
+            )
+        elif stored is not None:
+            if metadata.get("lazy_systematics") and fields.has_field(collection):
+                msg = f"cannot assemble the systematic variation '{systematic}': the nominal '{collection}' collection was reassigned, but only its varied fields are stored with lazy_systematics. Access the variation before modifying the nominal collection."
+                raise ValueError(msg)
+            # collections that the nominal events do not line up with (or do
+            # not have) are stored in full
+            contents[collection] = stored
+        elif fields.has_field(collection):
+            contents[collection] = _field(fields, collection)
+
+    layout = awkward.contents.RecordArray(
+        list(contents.values()),
+        list(contents),
+        length=fields.length,
+        parameters={"__record__": "Systematic", "metadata": {"systematic": systematic}},
+    )
+    if index is not None:
+        layout = awkward.contents.IndexedArray(index, layout)
+    return awkward.Array(layout, behavior=events.behavior, attrs=events.attrs)
+
+
+def systematic_view(events: Any, systematic: str) -> Any:
+    """Assemble a systematic variation over the nominal collections.
+
+    Unvaried fields are shared with the nominal collections rather than read
+    again. For eager and virtual arrays this happens automatically when
+    accessing ``events[systematic]`` (or ``events.<systematic>``). For dask
+    arrays, use this function instead; this is required to access systematics
+    built with :attr:`~atlas_schema.schema.NtupleSchema.lazy_systematics`.
+
+    Collections that were reassigned in *events* (for instance sorted or
+    filtered) are not used: the variation then holds the collections as
+    stored for it in the file. With
+    :attr:`~atlas_schema.schema.NtupleSchema.lazy_systematics`, only the
+    varied fields are stored, so assemble the variation before reassigning
+    the collections it varies.
+
+    Args:
+        events: nominal events (``awkward.Array`` or ``dask_awkward.Array``)
+        systematic (str): name of the systematic variation
+
+    Returns:
+        the systematic variation, with the same collections as the nominal events
+    """
+    lib = _array_library(events)
+    if lib is awkward:
+        return _assemble_systematic(events, systematic)
+    return lib.map_partitions(
+        _assemble_systematic, events, systematic, label=f"systematic-{systematic}"
+    )
+
+
+def _virtual_source(events):
+    """Return the form, length, mapping and buffer key that *events* were read with, if they were read virtually.
+
+    NanoEvents keeps these in private attributes of the factory stored in the
+    transient attributes of the events. This is the one place relying on
+    them: if anything is missing (events not built by a factory, a coffea
+    version storing them differently, or an eager mapping), ``None`` is
+    returned.
+    """
+    try:
+        factory = events.attrs["@events_factory"]
+        form = events.attrs["@form"]
+        buffer_key = events.attrs["@buffer_key"]
+        mapping = factory._mapping  # pylint: disable=protected-access
+        virtual = mapping._virtual  # pylint: disable=protected-access
+        length = len(factory)
+    except (AttributeError, KeyError, TypeError):
+        return None
+    if not virtual or not isinstance(form, dict):
+        return None
+    return form, length, mapping, buffer_key
+
+
+def _detached_record(events, systematic):
+    """Return the layout of the systematic record of *events* on nodes that are not cached by *events*.
+
+    Virtual arrays keep every buffer they load, for as long as they live.
+    Reading the record from freshly built nodes instead lets the buffers that
+    only belong to the variation be released together with its view. Eager
+    arrays already hold all their buffers, and sliced arrays no longer line
+    up with the file, so ``None`` is returned for those, to use the record of
+    *events* itself.
+    """
+    source = _virtual_source(events)
+    if source is None or not isinstance(events.layout, awkward.contents.RecordArray):
+        return None
+    form, length, mapping, buffer_key = source
+    if len(events) != length:
+        return None
+    return awkward.from_buffers(
+        dict(zip(form["fields"], form["contents"]))[systematic],
+        length,
+        mapping,
+        buffer_key=buffer_key,
+        backend="cpu",
+        byteorder="<" if sys.byteorder == "little" else ">",
+        allow_noncanonical_form=False,
+        highlevel=False,
+    )
+
+
+def iter_systematics(
+    events: Any, names: Iterable[str] | None = None, max_resident: int | None = 1
+) -> Iterator[tuple[str, Any]]:
+    """Iterate over systematic variations one at a time.
+
+    Unlike :attr:`NtupleEventsArray.systematics`, which builds every view at
+    once, each variation is assembled only when the iteration reaches it. For
+    virtual arrays, the buffers that only belong to a variation are released
+    once its view is no longer referenced, instead of staying cached by the
+    nominal events. For dask arrays, the views are task graphs built with
+    :func:`systematic_view`, which do not hold any buffers.
+
+    While iterating, ``events[name]`` returns the view that was yielded for
+    ``name``. At most *max_resident* of these views are kept alive by the
+    events at a time, and all of them are dropped when the iteration ends.
+
+    Args:
+        events: nominal events (``awkward.Array`` or ``dask_awkward.Array``)
+        names (list[str] | None): systematic variations to iterate over, defaults to all of them (excluding ``"NOSYS"``)
+        max_resident (int | None): number of recently yielded views kept alive by the events, or ``None`` for no bound
+
+    Yields:
+        tuple[str, Any]: name and view of each systematic variation
+
+    Example:
+        .. code-block:: python
+
+           for name, view in events.iter_systematics():
+               histogram.fill(systematic=name, pt=view.jet.pt[:, 0])
+    """
+    lib = _array_library(events)
+    form = events.form if lib is not awkward else events.layout.form
+    metadata = form.purelist_parameter("metadata") or {}
+    if names is None:
+        names = metadata.get("systematics", [])
+
+    if lib is not awkward or "varied" not in metadata:
+        for name in names:
+            yield name, events if name == "NOSYS" else systematic_view(events, name)
+        return
+
+    views = events.__dict__.setdefault("_systematic_views", {})
+    registered: list[str] = []
+    try:
+        for name in names:
+            if name == "NOSYS":
+                yield name, events
+                continue
+            if name not in views:
+                views[name] = _assemble_systematic(
+                    events, name, _detached_record(events, name)
+                )
+                registered.append(name)
+                while max_resident is not None and len(registered) > max_resident:
+                    views.pop(registered.pop(0), None)
+            yield name, views[name]
+    finally:
+        for name in registered:
+            views.pop(name, None)
+
+
+def _field_names(key):
+    """Names (``"jet"`` or ``"jet.pt"``) of the fields selected by the array index *key*."""
+    if isinstance(key, str):
+        return [key]
+    if isinstance(key, list) and all(isinstance(item, str) for item in key):
+        return list(key)
+    if isinstance(key, tuple):
+        names: list[tuple[str, ...]] = [()]
+        for item in key:
+            fields = _field_names(item)
+            if fields:
+                names = [(*name, field) for name in names for field in fields]
+        return [".".join(name[:2]) for name in names if name]
+    return []
+
 
 def _set_repr_name(classname):
     def namefcn(_self):
@@ -72,6 +372,14 @@ class NtupleEvents(behavior["NanoEvents"]):  # type: ignore[misc, valid-type, na
             if systematic != "NOSYS"
         ]
 
+    @property
+    def varied_fields(self):
+        """Get the fields that each systematic variation changes.
+
+        Returns a mapping of systematic variation name to ``{collection: [field, ...]}``.
+        """
+        return self.metadata.get("varied", {})
+
 
 behavior["NtupleEvents"] = NtupleEvents
 
@@ -79,17 +387,51 @@ behavior["NtupleEvents"] = NtupleEvents
 class NtupleEventsArray(behavior[("*", "NanoEvents")]):  # type: ignore[misc, valid-type, name-defined]
     """Collection of NtupleEvents objects, one for each systematic variation."""
 
+    def __awkward_validation__(self):
+        """Keep track of the collections built by the schema, and drop the views assembled over replaced ones.
+
+        Called by awkward whenever the array is created or its layout changes
+        (for instance through ``events["jet"] = ...``).
+        """
+        self.__dict__.pop("_systematic_views", None)
+        attrs = self.attrs
+        if _SCHEMA_COLLECTIONS in attrs:
+            return
+        metadata = self.layout.purelist_parameter("metadata") or {}
+        fields, _ = _event_fields(self.layout)
+        if not isinstance(fields, awkward.contents.RecordArray):
+            return
+        attrs[_SCHEMA_COLLECTIONS] = {
+            collection: weakref.ref(_field(fields, collection))
+            for collection in metadata.get("collections", [])
+            if fields.has_field(collection)
+        }
+
     def __getitem__(self, key):
         """Support accessing systematic variations via bracket notation.
 
+        Systematic variations are assembled over the nominal collections on
+        first access, sharing the buffers of their unvaried fields, and reused
+        until the events are modified.
+
         Args:
             key: The systematic variation name. "NOSYS" returns the nominal events.
 
         Returns:
             The requested systematic variation or nominal events for "NOSYS".
         """
-        if isinstance(key, str) and key == "NOSYS":
-            return self
+        accessed = _accessed_fields.get()
+        if accessed is not None:
+            accessed.update(_field_names(key))
+        if isinstance(key, str):
+            if key == "NOSYS":
+                return self
+            metadata = self.metadata or {}
+            if "varied" in metadata and key in metadata["systematics"]:
+                views = self.__dict__.setdefault("_systematic_views", {})
+                if key not in views:
+                    views[key] = _assemble_systematic(self, key)
+                return views[key]
         return super().__getitem__(key)
 
     @property
@@ -115,6 +457,92 @@ class NtupleEventsArray(behavior[("*", "NanoEvents")]):  # type: ignore[misc, va
             if systematic != "NOSYS"
         ]
 
+    @property
+    def varied_fields(self):
+        """Get the fields that each systematic variation changes.
+
+        Returns a mapping of systematic variation name to ``{collection: [field, ...]}``.
+        """
+        return self.metadata.get("varied", {})
+
+    def iter_systematics(self, names=None, max_resident=1):
+        """Iterate over systematic variations one at a time.
+
+        See :func:`iter_systematics`, which also supports dask arrays.
+
+        Args:
+            names (list[str] | None): systematic variations to iterate over, defaults to all of them (excluding ``"NOSYS"``)
+            max_resident (int | None): number of recently yielded views kept alive by the events, or ``None`` for no bound
+
+        Yields:
+            tuple[str, Any]: name and view of each systematic variation
+        """
+        return iter_systematics(self, names, max_resident)
+
+    def map_systematics(self, func, inputs=None):
+        """Evaluate *func* on the nominal events and on every systematic variation.
+
+        A systematic variation that does not change any of the inputs of
+        *func* would give the nominal result again, so the nominal result is
+        reused instead of evaluating *func* again. Weight-only or otherwise
+        unrelated systematics then cost nothing.
+
+        Args:
+            func (callable): function taking the events (or a systematic variation) and returning anything
+            inputs (list[str] | None): collections (``"jet"``) or fields (``"jet.pt"``) read by *func*. If ``None``, the collections and fields read while evaluating the nominal events are used, and every systematic variation is evaluated if none were read that way.
+
+        Returns:
+            dict[str, Any]: result of *func* for each name in :attr:`systematic_names`
+
+        Example:
+            .. code-block:: python
+
+               results = events.map_systematics(lambda events: events.jet.pt[:, :1])
+               # electron systematics do not change jets: nominal result is reused
+               assert results["EG_RESOLUTION_ALL__1up"] is results["NOSYS"]
+        """
+        if inputs is None:
+            accessed: set[str] = set()
+            token = _accessed_fields.set(accessed)
+            try:
+                nominal = func(self)
+            finally:
+                _accessed_fields.reset(token)
+            inputs = accessed
+            # nothing was read by name (only through awkward functions, for
+            # instance), so any systematic may change the result
+            reuse = bool(accessed)
+        else:
+            nominal = func(self)
+            reuse = True
+
+        # collection -> fields read (None for the whole collection)
+        read: dict[str, set[str] | None] = {}
+        for name in inputs:
+            collection, _, field = name.partition(".")
+            if not field:
+                read[collection] = None
+            elif read.get(collection, set()) is not None:
+                read.setdefault(collection, set()).add(field)
+
+        varied_fields = self.varied_fields
+        results = {"NOSYS": nominal}
+        for systematic in self.systematic_names[1:]:
+            varied = varied_fields.get(systematic)
+            if (
+                reuse
+                and varied is not None
+                and not any(
+                    collection in read
+                    and (read[collection] is None or read[collection] & set(fields))
+                    for collection, fields in varied.items()
+                )
+            ):
+                results[systematic] = nominal
+            else:
+                results[systematic] = func(self[systematic])
+        return results
+
 
 behavior[("*", "NtupleEvents")] = NtupleEventsArray
 
@@ -220,15 +648,51 @@ behavior.update(awkward._util.copy_behaviors("Particle", "Photon", behavior))  #
 class Photon(Particle, base.NanoCollection, base.Systematic):
     """Photon particle collection."""
 
+    @property
+    def _isEM_word(self):
+        """The nominal isEM word, also for ``isEM_syst`` stored as a record of variations."""
+        word = self.isEM_syst  # pylint: disable=no-member
+        if "NOSYS" in awkward.fields(word):
+            return word.NOSYS
+        return word
+
     @property
     def isEM(self):
-        return self.isEM_syst.NOSYS == 0  # pylint: disable=no-member
+        return self._isEM_word == 0
 
     def pass_isEM(self, words: list[PhotonID]):
         # 0 is pass, 1 is fail
-        return (
-            self.isEM_syst.NOSYS & reduce(ior, (1 << word.value for word in words))  # pylint: disable=no-member
-        ) == 0
+        return (self._isEM_word & PhotonID.mask(words)) == 0
+
+    def pass_isEM_working_points(self, working_points: Mapping[str, list[PhotonID]]):
+        """Evaluate several working points, each defined by the isEM words it requires.
+
+        The isEM word is read once for all working points, the mask of each of
+        them is compiled once with :meth:`~atlas_schema.enums.PhotonID.mask`, and
+        the word is tested against all the masks in a single broadcast operation.
+
+        Args:
+            working_points (Mapping[str, list[PhotonID]]): isEM words required by each named working point
+
+        Returns:
+            record of boolean arrays, one field per working point
+
+        Example:
+            .. code-block:: python
+
+               passed = events.ph.pass_isEM_working_points(
+                   {
+                       "no_rhad": [PhotonID.Rhad],
+                       "shower": PhotonID["Reta", "Rphi", "Weta2"],
+                   }
+               )
+               events.ph[passed.no_rhad & passed.shower]
+        """
+        masks = np.array(
+            [PhotonID.mask(words) for words in working_points.values()],
+            dtype=np.int64,
+        )
+        return _bits_clear(masks, list(working_points), self._isEM_word)
 
 
 _set_repr_name("Photon")
@@ -321,4 +785,6 @@ __all__ = [
     "PhotonArray",  # noqa: F822  # pylint: disable=undefined-all-variable
     "PhotonRecord",  # noqa: F822  # pylint: disable=undefined-all-variable
     "Weight",
+    "iter_systematics",
+    "systematic_view",
 ]
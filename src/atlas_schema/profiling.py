@@ -0,0 +1,153 @@
+"""Instrumentation of :class:`~atlas_schema.schema.NtupleSchema` builds.
+
+With :attr:`~atlas_schema.schema.NtupleSchema.profile_build` enabled, the
+schema records the wall time and the peak of traced memory allocations of each
+phase of the build, along with the number of branches, collections and
+systematics. The report is stored as a plain dictionary in the form metadata
+(``events.metadata["profile"]``), so it travels with the events to dask
+workers, and :func:`format_report` renders it as a table.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import time
+import tracemalloc
+from collections.abc import Iterator
+from typing import Any
+
+
+class BuildProfile:
+    """
+    Wall time and allocation peak of each phase of a schema build.
+
+    Memory is traced with :mod:`tracemalloc`, which is started for the duration
+    of each phase, and each phase records the peak of traced memory above the
+    start of the phase as ``peak_bytes``. Measuring that peak needs a reset of
+    the tracemalloc peak, so if the caller is already tracing, the profile does
+    not touch tracemalloc and records the net growth of traced memory over the
+    phase as ``growth_bytes`` instead; memory allocated and freed within the
+    phase is not part of it. Phases entered several times accumulate their
+    time and keep their largest peak (or growth).
+
+    Args:
+        enabled (bool): record phases, otherwise :meth:`phase` does nothing
+        trace_memory (bool): record the peak of traced memory allocations of each phase
+
+    Example:
+        >>> from atlas_schema.profiling import BuildProfile
+        >>> profile = BuildProfile()
+        >>> with profile.phase("parse"):
+        ...     words = "jet_pt_NOSYS".split("_")
+        >>> profile.count(branches=1)
+        >>> list(profile.to_dict()["phases"])
+        ['parse']
+        >>> profile.to_dict()["counts"]
+        {'branches': 1}
+    """
+
+    def __init__(self, enabled: bool = True, trace_memory: bool = True) -> None:
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        #: phase name to ``{"seconds": float, "peak_bytes": int}`` (or ``"growth_bytes"`` if the caller was tracing), in order of first entry
+        self.phases: dict[str, dict[str, float | int]] = {}
+        #: number of branches, collections, systematics, ...
+        self.counts: dict[str, int] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Record the wall time and allocation peak of the enclosed block as phase *name*."""
+        if not self.enabled:
+            yield
+            return
+
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            # a fresh start also resets the peak
+            tracemalloc.start()
+        if self.trace_memory:
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            memory = {"peak_bytes": 0}
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                if started_tracing:
+                    memory = {"peak_bytes": peak - baseline}
+                    tracemalloc.stop()
+                else:
+                    memory = {"growth_bytes": max(current - baseline, 0)}
+            entry = self.phases.setdefault(name, {"seconds": 0.0})
+            entry["seconds"] += seconds
+            for key, value in memory.items():
+                entry[key] = max(entry.get(key, 0), value)
+
+    def count(self, **counts: int) -> None:
+        """Record sizes of the build, such as the number of branches."""
+        if self.enabled:
+            self.counts.update(counts)
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serializable report, as stored in the form metadata."""
+        return {
+            "phases": {name: dict(entry) for name, entry in self.phases.items()},
+            "counts": dict(self.counts),
+            "seconds": sum(entry["seconds"] for entry in self.phases.values()),
+        }
+
+    def __str__(self) -> str:
+        return format_report(self.to_dict())
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """
+    Render a build report as a table, one row per phase.
+
+    Args:
+        report (dict): report of :meth:`BuildProfile.to_dict`, such as ``events.metadata["profile"]``
+
+    Returns:
+        str: the phases with their wall time, share of the total time, and allocation peak (or net growth, marked ``+``), followed by the counts
+
+    Example:
+        >>> from atlas_schema.profiling import format_report
+        >>> print(
+        ...     format_report(
+        ...         {
+        ...             "phases": {"parse": {"seconds": 0.5, "peak_bytes": 2048}},
+        ...             "counts": {"branches": 10},
+        ...             "seconds": 0.5,
+        ...         }
+        ...     )
+        ... )
+        phase    time [ms]       %   peak [kB]
+        parse        500.0   100.0         2.0
+        total        500.0
+        branches: 10
+    """
+    phases = report.get("phases", {})
+    total = report.get("seconds", 0.0)
+    width = max([len("phase"), len("total"), *(len(name) for name in phases)])
+    lines = [f"{'phase':<{width}}  {'time [ms]':>11}  {'%':>6}  {'peak [kB]':>10}"]
+    growth = False
+    for name, entry in phases.items():
+        share = 100 * entry["seconds"] / total if total else 0.0
+        if "peak_bytes" in entry:
+            memory = f"{entry['peak_bytes'] / 1024:>10.1f}"
+        else:
+            growth = True
+            memory = f"{'+' + format(entry['growth_bytes'] / 1024, '.1f'):>10}"
+        lines.append(
+            f"{name:<{width}}  {entry['seconds'] * 1e3:>11.1f}  {share:>6.1f}  {memory}"
+        )
+    lines.append(f"{'total':<{width}}  {total * 1e3:>11.1f}")
+    if growth:
+        lines.append("+: net growth of traced memory, tracemalloc was already tracing")
+    lines.extend(f"{name}: {value}" for name, value in report.get("counts", {}).items())
+    return "\n".join(lines)
+
+
+__all__ = ["BuildProfile", "format_report"]
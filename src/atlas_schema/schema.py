@@ -1,17 +1,40 @@
 from __future__ import annotations
 
-import difflib
+import functools
+import os
 import warnings
-from collections.abc import KeysView, ValuesView
-from typing import Any, ClassVar
+import weakref
+from collections.abc import Iterable, KeysView, Mapping, ValuesView
+from typing import Any, ClassVar, Literal
 
 import particle
 from coffea.nanoevents.schemas.base import BaseSchema, zip_forms
 
-from atlas_schema import transforms
+from atlas_schema import __version__, transforms
+from atlas_schema.branches import (
+    BranchIndex,
+    align_branches,
+    classify_nominal,
+    closest_behavior,
+    discover_systematics,
+    filter_branches,
+    index_branches,
+    resolve_collections,
+    select_systematics,
+)
+from atlas_schema.cache import FormCache, fingerprint
+from atlas_schema.derived import derive
+from atlas_schema.diagnostics import Diagnostics
 from atlas_schema.methods import behavior as roaster
+from atlas_schema.profiling import BuildProfile
 from atlas_schema.typing_compat import Behavior, Self
 
+#: behavior names matched by :meth:`NtupleSchema.suggested_behavior`, per schema
+#: class, along with the size of the behavior dictionary they were taken from
+_behavior_names: weakref.WeakKeyDictionary[type, tuple[int, tuple[str, ...]]] = (
+    weakref.WeakKeyDictionary()
+)
+
 
 class NtupleSchema(BaseSchema):  # type: ignore[misc]
     """The schema for building ATLAS ntuples following the typical centralized formats.
@@ -110,6 +133,76 @@ class NtupleSchema(BaseSchema):  # type: ignore[misc]
             }
 
      Now, ``events.recojet_antikt4PFlow`` and ``events.recojet_antikt10UFO`` will be separate collections, instead of a single ``events.recojet`` that incorrectly merged branches from each of these collections.
+
+    **Selecting systematics**
+
+     Jobs often only process a few systematic variations. Restricting :attr:`systematics_include` and :attr:`systematics_exclude` to glob patterns keeps every other systematic out of the form (and out of the task graph when running with dask) altogether. :meth:`with_systematics` builds such a schema on the fly:
+
+     .. code-block:: python
+
+        from atlas_schema.schema import NtupleSchema
+
+        schema = NtupleSchema.with_systematics(include=["JET_*"], exclude=["*__1down"])
+        events = NanoEventsFactory.from_root(..., schemaclass=schema).events()
+
+     The nominal (``NOSYS``) variation is always kept. Jobs that never use systematics, such as those over data, can pass ``schemaclass=NtupleSchema.nominal`` instead: :meth:`nominal` leaves every variation out without even discovering them.
+
+    **Selecting branches**
+
+     Analyses often read a small fraction of the branches of an ntuple. Restricting :attr:`branches_include` and :attr:`branches_exclude` to glob patterns of branch names drops every other branch before the schema looks at it, so that it never enters a collection, a systematic variation or the form. :meth:`with_branch_filter` builds such a schema on the fly:
+
+     .. code-block:: python
+
+        from atlas_schema.schema import NtupleSchema
+
+        schema = NtupleSchema.with_branch_filter(
+            include=["jet_*", "el_pt_*", "el_eta", "el_phi"],
+            exclude=["jet_*_JET_JER*"],
+        )
+        events = NanoEventsFactory.from_root(..., schemaclass=schema).events()
+
+     Patterns match whole raw branch names, as they are in the file; there are no separate settings for collections, subcollections and singletons, which are selected through their branches instead, such as ``jet_*`` for a collection, ``jet_pt_*`` for a subcollection with its systematics, or ``RandomRunNumber`` for a singleton. The :attr:`event_ids` are kept unless explicitly excluded. The branch list of :meth:`atlas_schema.tracing.AccessTrace.minimal_branches` can be passed as ``include``.
+
+    **Caching**
+
+     Files in the same dataset usually share the exact same branches, and building the form is then identical for each of them. Setting :attr:`cache_dir` stores every built form on disk, keyed by a fingerprint of the input branches and the schema configuration, so that later files (and other workers sharing the directory) skip building entirely:
+
+     .. code-block:: python
+
+        from atlas_schema.schema import NtupleSchema
+
+
+        class MySchema(NtupleSchema):
+            cache_dir = "/tmp/atlas-schema-cache"
+
+     Note that warnings raised while building a form are not repeated when the form is taken from the cache.
+
+    **Lazy systematics**
+
+     By default, every systematic variation is a complete copy of the nominal record in the form, which grows with the number of collections times the number of systematics. Setting :attr:`lazy_systematics` only stores the fields that actually vary, and assembles the full variation (falling back to nominal for everything else) the first time it is accessed:
+
+     .. code-block:: python
+
+        class MySchema(NtupleSchema):
+            lazy_systematics = True
+
+
+        events = NanoEventsFactory.from_root(..., schemaclass=MySchema).events()
+        events.JET_JER__1up.jet.pt  # assembled here, then reused
+
+     With ``mode="dask"``, use :func:`atlas_schema.methods.systematic_view` to assemble a variation instead.
+
+    **Heterogeneous datasets**
+
+     Files of a dataset do not always have the same branches, for instance when some samples lack a few systematics. Each file then gets a different form. Setting :attr:`fileset_branches` builds every file from the same branches instead: branches a file does not have are filled in, and branches that are not listed are dropped. The branches in :attr:`fileset_optional` are read as option-typed arrays in every file, with missing values in the files that do not have them. :meth:`atlas_schema.catalog.Catalog.schema` derives such a schema from the union or the intersection of the branches of all files:
+
+     .. code-block:: python
+
+        from atlas_schema.catalog import build_catalog
+
+        catalog = build_catalog(paths, treepath="reco")
+        schema = catalog.schema(mode="union")  # or "intersection"
+        events = NanoEventsFactory.from_root(..., schemaclass=schema).events()
     """
 
     __dask_capable__: ClassVar[bool] = True
@@ -120,6 +213,8 @@ class NtupleSchema(BaseSchema):  # type: ignore[misc]
     error_missing_event_ids: ClassVar[bool] = False
     #: Determine closest behavior for a given branch or treat branch as :attr:`default_behavior` (default is ``True``)
     identify_closest_behavior: ClassVar[bool] = True
+    #: similarity backend of :meth:`suggested_behavior`: ``"difflib"`` (default), or ``"rapidfuzz"`` which is faster but needs the optional ``rapidfuzz`` package (``pip install atlas-schema[rapidfuzz]``)
+    behavior_similarity: ClassVar[Literal["difflib", "rapidfuzz"]] = "difflib"
 
     #: event IDs to expect in data datasets
     event_ids_data: ClassVar[set[str]] = {
@@ -185,19 +280,96 @@ class NtupleSchema(BaseSchema):  # type: ignore[misc]
         "MissingET": {"rho": "met"},  # vector reads 'rho', not 'r' or 'met'
     }
 
+    #: glob patterns of the systematics to keep, or ``None`` to keep all of them (default ``None``)
+    systematics_include: ClassVar[tuple[str, ...] | None] = None
+    #: glob patterns of the systematics to drop, even if matched by :attr:`systematics_include` (default empty)
+    systematics_exclude: ClassVar[tuple[str, ...]] = ()
+
+    #: glob patterns of the branches to keep, or ``None`` to keep all of them (default ``None``)
+    branches_include: ClassVar[tuple[str, ...] | None] = None
+    #: glob patterns of the branches to drop, even if matched by :attr:`branches_include` (default empty)
+    branches_exclude: ClassVar[tuple[str, ...]] = ()
+
+    #: only build the nominal (``NOSYS``) collections and singletons, leaving every systematic variation out without discovering them, see :meth:`nominal` (default ``False``)
+    nominal_only: ClassVar[bool] = False
+
+    #: only store the varied fields of each systematic in the form, and assemble the full systematic record the first time it is accessed (default ``False``)
+    lazy_systematics: ClassVar[bool] = False
+
+    #: directory to store built forms in, shared across files with identical branches (default ``None``, no caching)
+    cache_dir: ClassVar[str | os.PathLike[str] | None] = None
+    #: maximum total size in bytes of :attr:`cache_dir` before least recently used forms are evicted (default 256 MiB)
+    cache_max_bytes: ClassVar[int] = 256 * 1024**2
+
+    #: forms of the branches to build every file from, or ``None`` to use the branches of each file (default ``None``)
+    fileset_branches: ClassVar[dict[str, dict[str, Any]] | None] = None
+    #: branches of :attr:`fileset_branches` that some files do not have, read as option-typed arrays in every file (default empty)
+    fileset_optional: ClassVar[frozenset[str]] = frozenset()
+
+    #: record the wall time and allocation peak of each phase of the build in ``events.metadata["profile"]``, see :mod:`atlas_schema.profiling` (default ``False``)
+    profile_build: ClassVar[bool] = False
+
     def __init__(self, base_form: dict[str, Any], version: str = "latest"):
+        if self.fileset_branches is not None:
+            base_form = align_branches(
+                base_form, self.fileset_branches, self.fileset_optional
+            )
+        if self.branches_include is not None or self.branches_exclude:
+            # the event IDs are kept unless excluded
+            base_form = filter_branches(
+                base_form, self.branches_include, self.branches_exclude, self.event_ids
+            )
         super().__init__(base_form)
         self._version = version
         if version == "latest":
             pass
         else:
             pass
-        self._form["fields"], self._form["contents"], discovered_systematics = (
-            self._build_collections(self._form["fields"], self._form["contents"])
+
+        self._profile = BuildProfile(enabled=self.profile_build)
+        n_branches = len(self._form["fields"])
+
+        cache = (
+            FormCache(self.cache_dir, self.cache_max_bytes)
+            if self.cache_dir is not None
+            else None
         )
+        key = ""
+        cached = None
+        if cache is not None:
+            with self._profile.phase("cache_lookup"):
+                key = self._fingerprint(base_form)
+                cached = cache.get(key)
+        if cached is not None:
+            self._form["fields"] = cached["fields"]
+            self._form["contents"] = cached["contents"]
+            metadata = cached["metadata"]
+        else:
+            self._form["fields"], self._form["contents"], metadata = (
+                self._build_collections(self._form["fields"], self._form["contents"])
+            )
+            if cache is not None:
+                with self._profile.phase("cache_store"):
+                    cache.put(
+                        key,
+                        {
+                            "fields": list(self._form["fields"]),
+                            "contents": list(self._form["contents"]),
+                            "metadata": metadata,
+                        },
+                    )
         self._form["parameters"]["metadata"]["version"] = self._version
-        self._form["parameters"]["metadata"]["systematics"] = discovered_systematics
+        self._form["parameters"]["metadata"].update(metadata)
         self._form["parameters"]["__record__"] = "NtupleEvents"
+        if self.profile_build:
+            # the report describes this build, so it is never stored in the cache
+            self._profile.count(
+                branches=n_branches,
+                collections=len(metadata["collections"]),
+                systematics=len(metadata["systematics"]),
+                cached=int(cached is not None),
+            )
+            self._form["parameters"]["metadata"]["profile"] = self._profile.to_dict()
 
     @classmethod
     def v1(cls, base_form: dict[str, Any]) -> Self:
@@ -208,6 +380,143 @@ class NtupleSchema(BaseSchema):  # type: ignore[misc]
         """
         return cls(base_form, version="1")
 
+    @classmethod
+    def nominal(cls, base_form: dict[str, Any]) -> Self:
+        """Build the NtupleEvents without any systematic variation
+
+        For example, one can use ``NanoEventsFactory.from_root("file.root", schemaclass=NtupleSchema.nominal)``
+        for data, or for the nominal pass over MC. Only the nominal collections
+        and the singletons are built, and systematics are not even discovered,
+        see :attr:`nominal_only`.
+        """
+        return cls._nominal_class()(base_form)
+
+    @classmethod
+    @functools.cache
+    def _nominal_class(cls) -> type[Self]:
+        if cls.nominal_only:
+            return cls
+        derived: type[Self] = derive(cls, "_nominal_class", (), {"nominal_only": True})
+        return derived
+
+    @classmethod
+    def with_systematics(
+        cls,
+        include: Iterable[str] | None = None,
+        exclude: Iterable[str] = (),
+    ) -> type[Self]:
+        """Derive a schema only keeping the selected systematic variations
+
+        For example, ``NanoEventsFactory.from_root("file.root", schemaclass=NtupleSchema.with_systematics(include=["JET_*"]))``
+        only builds the nominal and the ``JET_*`` variations.
+
+        Args:
+            include (list[str] | None): glob patterns of the systematics to keep, or ``None`` to keep all of them
+            exclude (list[str]): glob patterns of the systematics to drop
+
+        Returns:
+            type[NtupleSchema]: subclass with :attr:`systematics_include` and :attr:`systematics_exclude` set
+        """
+        include = None if include is None else tuple(include)
+        exclude = tuple(exclude)
+        derived: type[Self] = derive(
+            cls,
+            "with_systematics",
+            (include, exclude),
+            {"systematics_include": include, "systematics_exclude": exclude},
+        )
+        return derived
+
+    @classmethod
+    def with_branch_filter(
+        cls,
+        include: Iterable[str] | None = None,
+        exclude: Iterable[str] = (),
+    ) -> type[Self]:
+        """Derive a schema only keeping the selected branches
+
+        For example, ``NanoEventsFactory.from_root("file.root", schemaclass=NtupleSchema.with_branch_filter(include=["jet_*"]))``
+        only builds the ``jet`` collection and the event IDs.
+
+        Args:
+            include (list[str] | None): glob patterns of the branches to keep, or ``None`` to keep all of them
+            exclude (list[str]): glob patterns of the branches to drop
+
+        Returns:
+            type[NtupleSchema]: subclass with :attr:`branches_include` and :attr:`branches_exclude` set
+        """
+        include = None if include is None else tuple(include)
+        exclude = tuple(exclude)
+        derived: type[Self] = derive(
+            cls,
+            "with_branch_filter",
+            (include, exclude),
+            {"branches_include": include, "branches_exclude": exclude},
+        )
+        return derived
+
+    @classmethod
+    def with_branches(
+        cls,
+        branches: Mapping[str, dict[str, Any]],
+        optional: Iterable[str] = (),
+    ) -> type[Self]:
+        """Derive a schema building every file from the same branches
+
+        Args:
+            branches (Mapping[str, dict]): form of each branch, from any file that has it
+            optional (list[str]): branches that some files do not have
+
+        Returns:
+            type[NtupleSchema]: subclass with :attr:`fileset_branches` and :attr:`fileset_optional` set
+        """
+        branches = dict(branches)
+        optional = frozenset(optional)
+        derived: type[Self] = derive(
+            cls,
+            "with_branches",
+            (branches, optional),
+            {"fileset_branches": branches, "fileset_optional": optional},
+        )
+        return derived
+
+    def _fingerprint(self, base_form: dict[str, Any]) -> str:
+        """Fingerprint of the input branches and every setting that changes the built form."""
+        cls = type(self)
+        return fingerprint(
+            base_form["fields"],
+            base_form["contents"],
+            {
+                "schema": f"{cls.__module__}.{cls.__qualname__}",
+                "atlas_schema": __version__,
+                "version": self._version,
+                "mixins": list(self.mixins.items()),
+                "singletons": self.singletons,
+                "event_ids": self.event_ids,
+                "full_like_items": self.full_like_items,
+                "rename_items": self.rename_items,
+                "alias_items": self.alias_items,
+                "default_behavior": self.default_behavior,
+                "identify_closest_behavior": self.identify_closest_behavior,
+                "behavior_similarity": self.behavior_similarity,
+                "error_missing_event_ids": self.error_missing_event_ids,
+                "lazy_systematics": self.lazy_systematics,
+                "nominal_only": self.nominal_only,
+                "systematics_include": self.systematics_include,
+                "systematics_exclude": self.systematics_exclude,
+                "branches_include": self.branches_include,
+                "branches_exclude": self.branches_exclude,
+            },
+        )
+
+    def _diagnose(self, category: str, item: str, message: str) -> None:
+        """Collect a warning about *item* during a build, or raise it right away otherwise."""
+        diagnostics = getattr(self, "_diagnostics", None)
+        if diagnostics is None:
+            warnings.warn(message, RuntimeWarning, stacklevel=3)
+        else:
+            diagnostics.add(category, item, message)
+
     def _apply_vector_fields(
         self, behavior_name: str, collection_content: dict[str, Any]
     ) -> None:
@@ -224,25 +533,27 @@ class NtupleSchema(BaseSchema):  # type: ignore[misc]
             if source_field not in collection_content:
                 continue
             if new_field in collection_content:
-                warnings.warn(
+                self._diagnose(
+                    "vector-field-exists",
+                    f"{behavior_name}.{new_field}",
                     f"Field '{new_field}' already present in collection with behavior "
                     f"'{behavior_name}'; skipping materialization. [vector-field-exists]",
-                    RuntimeWarning,
-                    stacklevel=2,
                 )
                 continue
-            collection_content[new_field] = transforms.full_like_from_content_form(
-                collection_content[source_field], fill_value
+            collection_content[new_field] = transforms.full_like_form(
+                collection_content[source_field],
+                fill_value,
+                memo=getattr(self, "_full_like_forms", None),
             )
         for new_field, old_field in self.rename_items.get(behavior_name, {}).items():
             if old_field not in collection_content:
                 continue
             if new_field in collection_content:
-                warnings.warn(
+                self._diagnose(
+                    "vector-field-exists",
+                    f"{behavior_name}.{new_field}",
                     f"Field '{new_field}' already present in collection with behavior "
                     f"'{behavior_name}'; skipping rename of '{old_field}'. [vector-field-exists]",
-                    RuntimeWarning,
-                    stacklevel=2,
                 )
                 continue
             collection_content[new_field] = collection_content.pop(old_field)
@@ -250,58 +561,38 @@ class NtupleSchema(BaseSchema):  # type: ignore[misc]
             if source_field not in collection_content:
                 continue
             if new_field in collection_content:
-                warnings.warn(
+                self._diagnose(
+                    "vector-field-exists",
+                    f"{behavior_name}.{new_field}",
                     f"Field '{new_field}' already present in collection with behavior "
                     f"'{behavior_name}'; skipping alias. [vector-field-exists]",
-                    RuntimeWarning,
-                    stacklevel=2,
                 )
                 continue
             collection_content[new_field] = collection_content[source_field]
 
     def _build_collections(
         self, field_names: list[str], input_contents: list[Any]
-    ) -> tuple[KeysView[str], ValuesView[dict[str, Any]], list[str]]:
+    ) -> tuple[KeysView[str], ValuesView[dict[str, Any]], dict[str, Any]]:
         branch_forms = dict(zip(field_names, input_contents))
+        # full_like forms are shared between the nominal and all systematic records
+        self._full_like_forms: dict[tuple[str, float], dict[str, Any]] = {}
+        # repeated warnings are collected and summarized once per category
+        self._diagnostics = Diagnostics()
+        profile = self._profile
 
         # parse into high-level records (collections, list collections, and singletons)
-        collections = {
-            k.split("_")[0] for k in branch_forms if k not in self.singletons
-        }
-        collections -= self.event_ids
-        collections -= set(self.singletons)
-
-        # now handle any collections that we identified that are substrings of the items in the mixins
-        # convert all valid branch_forms into strings to make the lookups a bit faster
-        bf_str = ",".join(branch_forms.keys())
-        for mixin in self.mixins:
-            if mixin in collections:
-                continue
-            if f",{mixin}_" not in bf_str and not bf_str.startswith(f"{mixin}_"):
-                continue
-            if "_" in mixin:
-                warnings.warn(
-                    f"I identified a mixin that I did not automatically identify as a collection because it contained an underscore: '{mixin}'. I will add this to the known collections. To suppress this warning next time, please create your ntuples with collections without underscores. [mixin-underscore]",
-                    RuntimeWarning,
-                    stacklevel=2,
-                )
-            collections.add(mixin)
-            for collection in list(collections):
-                if mixin.startswith(f"{collection}_"):
-                    warnings.warn(
-                        f"I found a misidentified collection: '{collection}'. I will remove this from the known collections. To suppress this warning next time, please create your ntuples with collections that are not similarly named with underscores. [collection-subset]",
-                        RuntimeWarning,
-                        stacklevel=2,
-                    )
-                    collections.remove(collection)
-                    break
+        with profile.phase("resolve_collections"):
+            collections = resolve_collections(
+                branch_forms, self.mixins, self.singletons, self.event_ids
+            )
 
         # rename needed because easyjet breaks the AMG assumptions
         # https://gitlab.cern.ch/easyjet/easyjet/-/issues/246
-        for k in list(branch_forms):
-            if "NOSYS" not in k:
-                continue
-            branch_forms[k.replace("_NOSYS", "") + "_NOSYS"] = branch_forms.pop(k)
+        with profile.phase("nosys_rename"):
+            for k in list(branch_forms):
+                if "NOSYS" not in k:
+                    continue
+                branch_forms[k.replace("_NOSYS", "") + "_NOSYS"] = branch_forms.pop(k)
 
         # these are collections with systematic variations
         try:
@@ -314,18 +605,37 @@ class NtupleSchema(BaseSchema):  # type: ignore[misc]
             msg = "One of the branches does not follow the assumed pattern for this schema. [invalid-branch-name]"
             raise RuntimeError(msg) from exc
 
-        all_systematics = self._discover_systematics(
-            branch_forms, collections, subcollections
-        )
+        if self.nominal_only:
+            # variations are left out when classifying the branches below
+            all_systematics = {"NOSYS"}
+        else:
+            with profile.phase("discover_systematics"):
+                # tokenize every branch name once; everything below is built from this index
+                index = index_branches(branch_forms, collections, subcollections)
 
-        # Pre-compute systematic branch patterns for O(1) lookups
-        # This replaces the expensive O(m*s) nested condition checks
-        systematic_branch_patterns = set()
-        for collection in collections:
-            for subcoll in subcollections:
-                for sys in all_systematics:
-                    if sys != "NOSYS":
-                        systematic_branch_patterns.add(f"{collection}_{subcoll}_{sys}")
+                discovered_systematics = self._discover_systematics(
+                    branch_forms, collections, subcollections, index=index
+                )
+                all_systematics = select_systematics(
+                    discovered_systematics,
+                    self.systematics_include,
+                    self.systematics_exclude,
+                )
+                # branches of dropped systematics are left out of the form entirely
+                dropped_systematics = discovered_systematics - all_systematics
+
+                # branches that are a systematic variation of a subcollection, taken from
+                # the index so this grows with the branches rather than with every
+                # (collection, subcollection, systematic) combination
+                systematic_branches = {
+                    branch_name
+                    for branch_name, entries in index.items()
+                    if any(
+                        systematic != "NOSYS" and systematic in all_systematics
+                        for _, _, splits in entries
+                        for _, systematic in splits
+                    )
+                }
 
         # Check the presence of the event_ids
         missing_event_ids = [
@@ -366,214 +676,261 @@ class NtupleSchema(BaseSchema):  # type: ignore[misc]
         output = {}
 
         # first, register singletons (event-level, others)
-        for name in {*self.event_ids, *self.singletons}:
-            if name in [*missing_event_ids, *missing_singletons]:
-                continue
-
-            output[name] = branch_forms[name]
-
-        # First, build nominal collections the traditional way
-        nominal_collections = {}
-        for collection_name in collections:
-            collection_content = {}
-            used = set()
-
-            # Process subcollections with NOSYS variations
-            for subname in subcollections:
-                prefix = f"{collection_name}_{subname}_"
-                nosys_branch = f"{prefix}NOSYS"
+        for name, form in branch_forms.items():
+            if name in self.event_ids or name in self.singletons:
+                output[name] = form
+
+        with profile.phase("classify_branches"):
+            # Classify every indexed branch into its record(s):
+            #   - nosys_fields: {collection: {subcollection: form}} from '{collection}_{subcollection}_NOSYS'
+            #   - plain_fields: {collection: {field: form}} for branches that never vary (like eta, phi)
+            #   - varied_fields: {systematic: {collection: {subcollection: form}}}
+            nosys_fields: dict[str, dict[str, Any]] = {}
+            plain_fields: dict[str, dict[str, Any]] = {}
+            varied_fields: dict[str, dict[str, dict[str, Any]]] = {}
+            # branches belonging to a collection
+            members: Mapping[str, Any]
+            if self.nominal_only:
+                members = classify_nominal(
+                    branch_forms,
+                    collections,
+                    subcollections,
+                    nosys_fields,
+                    plain_fields,
+                )
+                ordered_collections = list(dict.fromkeys(members.values()))
+            else:
+                members = index
+                for branch_name, entries in index.items():
+                    form = branch_forms[branch_name]
+                    if dropped_systematics and any(
+                        systematic in dropped_systematics
+                        for _, _, splits in entries
+                        for _, systematic in splits
+                    ):
+                        continue
+                    for collection_name, remainder, splits in entries:
+                        for subname, systematic in splits:
+                            if systematic != "NOSYS" and systematic in all_systematics:
+                                varied_fields.setdefault(systematic, {}).setdefault(
+                                    collection_name, {}
+                                )[subname] = form
+                        if "_NOSYS" in branch_name:
+                            subname = remainder[: -len("_NOSYS")]
+                            if (
+                                remainder.endswith("_NOSYS")
+                                and subname in subcollections
+                            ):
+                                nosys_fields.setdefault(collection_name, {})[
+                                    subname
+                                ] = form
+                        elif branch_name not in systematic_branches:
+                            plain_fields.setdefault(collection_name, {}).setdefault(
+                                remainder, form
+                            )
+
+                # collections in order of first appearance in the branch list
+                ordered_collections = list(
+                    dict.fromkeys(
+                        collection_name
+                        for entries in index.values()
+                        for collection_name, _, _ in entries
+                    )
+                )
 
-                if nosys_branch in branch_forms:
-                    collection_content[subname] = branch_forms[nosys_branch]
-                    used.add(nosys_branch)
+        with profile.phase("nominal"):
+            # First, build nominal collections
+            nominal_collections = {}
+            # fields of each nominal collection, to tell which ones a systematic varies
+            nominal_contents: dict[str, dict[str, Any]] = {}
+            for collection_name in ordered_collections:
+                collection_content = dict(nosys_fields.get(collection_name, {}))
+                for field_name, form in plain_fields.get(collection_name, {}).items():
+                    collection_content.setdefault(field_name, form)
 
-            # Add non-systematic branches (like eta, phi that don't vary)
-            for k, form in branch_forms.items():
-                if (
-                    k.startswith(collection_name + "_")
-                    and k not in used
-                    and "_NOSYS" not in k
-                    and k
-                    not in systematic_branch_patterns  # O(1) lookup instead of O(m*s)
-                ):
-                    field_name = k[len(collection_name) + 1 :]
-                    if field_name not in collection_content:
-                        collection_content[field_name] = form
-
-            if collection_content:
-                behavior = self.mixins.get(collection_name, "")
-                if not behavior:
-                    behavior = self.suggested_behavior(collection_name)
-                    warnings.warn(
-                        f"I found a collection with no defined mixin: '{collection_name}'. I will assume behavior: '{behavior}'. To suppress this warning next time, please define mixins for your custom collections. [mixin-undefined]",
-                        RuntimeWarning,
-                        stacklevel=2,
+                if collection_content:
+                    behavior = self.mixins.get(collection_name, "")
+                    if not behavior:
+                        behavior = self.suggested_behavior(collection_name)
+                        self._diagnose(
+                            "mixin-undefined",
+                            collection_name,
+                            f"I found a collection with no defined mixin: '{collection_name}'. I will assume behavior: '{behavior}'. To suppress this warning next time, please define mixins for your custom collections. [mixin-undefined]",
+                        )
+                    nominal_collections[collection_name] = self._zip_collection(
+                        collection_name, behavior, collection_content
                     )
-                self._apply_vector_fields(behavior, collection_content)
-                nominal_collections[collection_name] = zip_forms(
-                    collection_content, collection_name, record_name=behavior
-                )
-                nominal_collections[collection_name].setdefault("parameters", {})
-                nominal_collections[collection_name]["parameters"].update(
-                    {"collection_name": collection_name}
-                )
+                    nominal_contents[collection_name] = collection_content
 
         # Add nominal collections to output
         output.update(nominal_collections)
 
-        # Now build systematic event structures
-        for systematic in all_systematics:
-            if systematic == "NOSYS":
-                continue
-
-            # Check which collections actually have this systematic variation
-            systematic_collections = {}
-
-            for collection_name in collections:
-                # Check if this collection has any systematic branches for this systematic
-                has_systematic_data = False
-                collection_content = {}
-                used = set()
-
-                # Process subcollections with systematic variations
-                for subname in subcollections:
-                    prefix = f"{collection_name}_{subname}_"
-                    target_branch = f"{prefix}{systematic}"
-                    fallback_branch = f"{prefix}NOSYS"
-
-                    if target_branch in branch_forms:
-                        # Use the systematic variation
-                        collection_content[subname] = branch_forms[target_branch]
-                        used.add(target_branch)
-                        has_systematic_data = True
-                    elif fallback_branch in branch_forms:
-                        # Fall back to nominal
-                        collection_content[subname] = branch_forms[fallback_branch]
-                        used.add(fallback_branch)
-
-                # Add non-systematic branches
-                for k, form in branch_forms.items():
-                    if (
-                        k.startswith(collection_name + "_")
-                        and k not in used
-                        and "_NOSYS" not in k
-                        and k
-                        not in systematic_branch_patterns  # O(1) lookup instead of O(m*s)
-                    ):
-                        field_name = k[len(collection_name) + 1 :]
-                        if field_name not in collection_content:
-                            collection_content[field_name] = form
+        with profile.phase("systematics"):
+            # Now build systematic event structures
+            # {systematic: {collection: [field, ...]}} of the fields that differ from nominal
+            systematic_varied_fields: dict[str, dict[str, list[str]]] = {}
+            for systematic in sorted(all_systematics):
+                if systematic == "NOSYS":
+                    continue
+
+                varied = varied_fields.get(systematic, {})
+                systematic_collections = {}
+                varied_names = systematic_varied_fields.setdefault(systematic, {})
+                for collection_name in ordered_collections:
+                    # If no systematic data, use the nominal collection directly
+                    if collection_name not in varied:
+                        if (
+                            collection_name in nominal_collections
+                            and not self.lazy_systematics
+                        ):
+                            systematic_collections[collection_name] = (
+                                nominal_collections[collection_name]
+                            )
+                        continue
 
-                # If this collection has systematic data or fallback data, include it
-                if collection_content:
                     behavior = self.mixins.get(collection_name, "")
                     if not behavior:
                         behavior = self.suggested_behavior(collection_name)
                         # Only warn once (for nominal collections)
 
-                    # If no systematic data, use the nominal collection directly
-                    if (
-                        not has_systematic_data
-                        and collection_name in nominal_collections
-                    ):
-                        systematic_collections[collection_name] = nominal_collections[
-                            collection_name
-                        ]
-                    else:
-                        # Build the systematic collection
+                    # constant fields (like lepton masses) never differ from nominal
+                    constant_fields = self.full_like_items.get(behavior, {})
+
+                    if self.lazy_systematics and collection_name in nominal_collections:
+                        # Only the recipe: the varied fields (as a plain record,
+                        # not a full particle), laid over the nominal collection
+                        # when the systematic is accessed
+                        collection_content = dict(varied[collection_name])
                         self._apply_vector_fields(behavior, collection_content)
-                        systematic_collections[collection_name] = zip_forms(
-                            collection_content, collection_name, record_name=behavior
+                        systematic_collections[collection_name] = (
+                            transforms.share_offsets(
+                                zip_forms(collection_content, collection_name),
+                                nominal_collections[collection_name],
+                            )
                         )
-                        systematic_collections[collection_name].setdefault(
-                            "parameters", {}
+                        varied_names[collection_name] = [
+                            field_name
+                            for field_name in collection_content
+                            if field_name not in constant_fields
+                        ]
+                        continue
+
+                    # Use the systematic variation, falling back to nominal
+                    collection_content = {
+                        subname: varied[collection_name].get(subname, form)
+                        for subname, form in nosys_fields.get(
+                            collection_name, {}
+                        ).items()
+                    }
+                    for subname, form in varied[collection_name].items():
+                        collection_content.setdefault(subname, form)
+                    for field_name, form in plain_fields.get(
+                        collection_name, {}
+                    ).items():
+                        collection_content.setdefault(field_name, form)
+
+                    form = self._zip_collection(
+                        collection_name, behavior, collection_content
+                    )
+                    if collection_name in nominal_collections:
+                        form = transforms.share_offsets(
+                            form, nominal_collections[collection_name]
                         )
-                        systematic_collections[collection_name]["parameters"].update(
-                            {"collection_name": collection_name}
+                    nominal_content = nominal_contents.get(collection_name, {})
+                    varied_names[collection_name] = [
+                        field_name
+                        for field_name, field_form in collection_content.items()
+                        if nominal_content.get(field_name) is not field_form
+                        and not (
+                            field_name in constant_fields
+                            and field_name in nominal_content
                         )
-
-            # Only create systematic event if there are collections for it
-            if systematic_collections:
-                output[systematic] = {
-                    "class": "RecordArray",
-                    "contents": list(systematic_collections.values()),
-                    "fields": list(systematic_collections.keys()),
-                    "form_key": f"%21invalid%2C{systematic}",
-                    "parameters": {
-                        "__record__": "Systematic",
-                        "metadata": {"systematic": systematic},
-                    },
-                }
-
-        # Handle any remaining unrecognized branches as singletons
-        processed_branches = set()
-        # Add event IDs and explicit singletons
-        processed_branches.update(self.event_ids)
-        processed_branches.update(self.singletons)
-        # Add collection-related branches
-        for collection_name in collections:
-            for branch_name in branch_forms:
-                if branch_name.startswith(collection_name + "_"):
-                    processed_branches.add(branch_name)
-
-        # Find unrecognized branches
-        for branch_name, form in branch_forms.items():
-            if branch_name not in processed_branches:
+                    ]
+                    systematic_collections[collection_name] = form
+
+                # Only create systematic event if there are collections for it
+                if systematic_collections:
+                    output[systematic] = {
+                        "class": "RecordArray",
+                        "contents": list(systematic_collections.values()),
+                        "fields": list(systematic_collections.keys()),
+                        "form_key": f"%21invalid%2C{systematic}",
+                        "parameters": {
+                            "__record__": "Systematic",
+                            "metadata": {"systematic": systematic},
+                        },
+                    }
+
+        with profile.phase("singletons"):
+            # Handle any remaining unrecognized branches as singletons; every
+            # branch in the index belongs to a collection
+            for branch_name, form in branch_forms.items():
+                if (
+                    branch_name in members
+                    or branch_name in self.event_ids
+                    or branch_name in self.singletons
+                ):
+                    continue
                 # This is an unrecognized branch - treat as singleton with warning
-                warnings.warn(
+                self._diagnose(
+                    "singleton-undefined",
+                    branch_name,
                     f"I identified a branch that likely does not have any leaves: '{branch_name}'. I will treat this as a 'singleton'. To suppress this warning, add this branch to the singletons set. [singleton-undefined]",
-                    RuntimeWarning,
-                    stacklevel=2,
                 )
                 output[branch_name] = form
 
         # Return discovered systematics (excluding NOSYS/nominal)
-        discovered_systematics = sorted([s for s in all_systematics if s != "NOSYS"])
-
-        return output.keys(), output.values(), discovered_systematics
+        metadata: dict[str, Any] = {
+            "systematics": sorted([s for s in all_systematics if s != "NOSYS"]),
+            "collections": list(nominal_collections),
+            "varied": systematic_varied_fields,
+            "event_ids": sorted(self.event_ids),
+        }
+        if self.lazy_systematics:
+            metadata["lazy_systematics"] = True
+        if self._diagnostics:
+            metadata["diagnostics"] = self._diagnostics.to_dict()
+            self._diagnostics.warn(stacklevel=2)
+
+        return output.keys(), output.values(), metadata
+
+    def _zip_collection(
+        self, collection_name: str, behavior: str, collection_content: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Zip the fields of a single collection into a record form with the given behavior."""
+        self._apply_vector_fields(behavior, collection_content)
+        form: dict[str, Any] = zip_forms(
+            collection_content, collection_name, record_name=behavior
+        )
+        form.setdefault("parameters", {})
+        form["parameters"].update({"collection_name": collection_name})
+        return form
 
     def _discover_systematics(
         self,
         branch_forms: dict[str, Any],
         collections: set[str],
         subcollections: set[str],
+        index: BranchIndex | None = None,
     ) -> set[str]:
         """Extract systematic variations from branch names.
 
+        Handles the pattern ``{collection}_{subcollection}_{systematic}``, where the
+        systematic can contain double underscores like ``JET_EnergyResolution__1up``.
+        The longest known subcollection wins when several would match.
+
+        Args:
+            branch_forms (dict): branch name to form
+            collections (set): known collections
+            subcollections (set): known subcollections
+            index (dict): optional, pre-computed result of :func:`~atlas_schema.branches.index_branches`
+
         Returns:
             set: Set of all systematic variation names found in branches
         """
-        # Optimize systematic discovery: pre-index branches by pattern
-        # This avoids O(n*m) nested loops in systematic discovery
-        subcoll_patterns = {f"{subcoll}_" for subcoll in subcollections}
-
-        all_systematics = set()
-        for k in branch_forms:
-            if not ("_" in k and k not in self.singletons):
-                continue
-            # Handle the pattern: collection_subcollection_systematic
-            # where systematic can contain double underscores like "JET_EnergyResolution__1up"
-            parts = k.split("_")
-            if len(parts) < 3:
-                continue
-            # Find the collection and subcollection parts
-            collection = parts[0]
-            if collection not in collections:
-                continue
-            # Find where the subcollection ends by looking for a known pattern
-            # The systematic starts after the subcollection
-            remaining = "_".join(parts[1:])
-            # Use optimized lookup instead of iterating all subcollections
-            for pattern in subcoll_patterns:
-                if remaining.startswith(pattern):
-                    systematic = remaining[len(pattern) :]
-                    if systematic and systematic != "NOSYS":
-                        all_systematics.add(systematic)
-                    break
-
-        # Always include NOSYS as the nominal case
-        all_systematics.add("NOSYS")
-        return all_systematics
+        if index is None:
+            index = index_branches(branch_forms, collections, subcollections)
+        return discover_systematics(index, self.singletons)
 
     @classmethod
     def behavior(cls) -> Behavior:
@@ -584,6 +941,20 @@ class NtupleSchema(BaseSchema):  # type: ignore[misc]
         """
         return roaster
 
+    @classmethod
+    def _behavior_names(cls) -> tuple[str, ...]:
+        """Names of the behaviors to suggest from, collected once per class.
+
+        The names are collected again only when behaviors were registered in the
+        meantime, and are held weakly so that derived classes are not kept alive.
+        """
+        behaviors = cls.behavior()
+        cached = _behavior_names.get(cls)
+        if cached is None or cached[0] != len(behaviors):
+            names = tuple(b for b in behaviors if isinstance(b, str))
+            cached = _behavior_names[cls] = (len(behaviors), names)
+        return cached[1]
+
     @classmethod
     def suggested_behavior(cls, key: str, cutoff: float = 0.4) -> str:
         """
@@ -591,6 +962,9 @@ class NtupleSchema(BaseSchema):  # type: ignore[misc]
 
         Default behavior: :class:`~coffea.nanoevents.methods.base.NanoCollection`.
 
+        Suggestions are cached per set of behaviors, *key* and *cutoff*, so collections
+        seen again (for instance in each systematic variation) are not matched again.
+
         Note:
             If :attr:`identify_closest_behavior` is ``False``, then this function will return the default behavior ``NanoCollection``.
 
@@ -616,16 +990,9 @@ class NtupleSchema(BaseSchema):  # type: ignore[misc]
             'NanoCollection'
         """
         if cls.identify_closest_behavior:
-            # lowercase everything to do case-insensitive matching
-            behaviors = [b for b in cls.behavior() if isinstance(b, str)]
-            behaviors_l = [b.lower() for b in behaviors]
-            results = difflib.get_close_matches(
-                key.lower(), behaviors_l, n=1, cutoff=cutoff
+            behavior = closest_behavior(
+                key, cutoff, cls._behavior_names(), cls.behavior_similarity
             )
-            if not results:
-                return cls.default_behavior
-
-            behavior = results[0]
-            # need to identify the index and return the unlowered version
-            return behaviors[behaviors_l.index(behavior)]
+            if behavior is not None:
+                return behavior
         return cls.default_behavior
@@ -0,0 +1,221 @@
+"""Trace the branches a processor reads, to read only those in the next run.
+
+Pass an :class:`AccessTrace` as the ``access_log`` of
+:class:`~coffea.nanoevents.NanoEventsFactory` in ``virtual`` mode, run the
+processor on a small sample, and ask the trace for the minimal list of ROOT
+branches it needs. Branches are recorded under their names in the file, so the
+``NOSYS`` rename and the vector field tables of
+:class:`~atlas_schema.schema.NtupleSchema` (``rename_items``, ``alias_items``,
+``full_like_items``) are already undone:
+
+.. code-block:: python
+
+    from atlas_schema.tracing import AccessTrace
+
+    trace = AccessTrace()
+    events = NanoEventsFactory.from_root(
+        {path: "reco"},
+        schemaclass=NtupleSchema,
+        mode="virtual",
+        access_log=trace,
+        entry_stop=1000,
+    ).events()
+    processor(events)
+    branches = trace.minimal_branches(events)
+
+    # the next run only reads these branches
+    events = NanoEventsFactory.from_root(
+        {path: "reco"},
+        schemaclass=NtupleSchema,
+        iteritems_options={"filter_name": branches},
+    ).events()
+
+With ``mode="dask"``, :func:`dask_awkward.report_necessary_columns` lists the
+same branch names without running the processor.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+from urllib.parse import quote, unquote
+
+from atlas_schema.schema import NtupleSchema
+
+#: fields the vector behaviors need to build a collection, kept for every collection the processor touches
+COORDINATE_FIELDS = frozenset(
+    {"pt", "eta", "phi", "mass", "rho", "theta", "x", "y", "z", "t", "energy"}
+)
+
+
+def _branches(form_key: str | None) -> set[str]:
+    """Names of the branches loaded by *form_key*."""
+    if not form_key:
+        return set()
+    tokens = unquote(form_key).split(",")
+    return {
+        token
+        for token, following in zip(tokens, tokens[1:])
+        if following.startswith("!load")
+    }
+
+
+def _walk(
+    form: dict[str, Any], path: tuple[str, ...] = ()
+) -> Iterator[tuple[tuple[str, ...], dict[str, Any]]]:
+    """Every node of *form* with the field path leading to it."""
+    yield path, form
+    if "fields" in form:
+        for field, content in zip(form["fields"], form["contents"]):
+            yield from _walk(content, (*path, field))
+    elif "content" in form:
+        yield from _walk(form["content"], path)
+
+
+def _read_value(form: dict[str, Any], read: Callable[[dict[str, Any]], bool]) -> bool:
+    """Whether *form* holds values rather than records, and any of its buffers was read."""
+    subtree = [node for _, node in _walk(form)]
+    return not any("fields" in node for node in subtree) and any(
+        read(node) for node in subtree
+    )
+
+
+class AccessTrace(list):  # type: ignore[type-arg]
+    """
+    Branches loaded by virtual NanoEvents, in order of access.
+
+    coffea appends one ``Accessed(branch, buffer_key)`` entry per buffer it
+    reads; :meth:`add` records branches from other sources, such as the
+    columns reported for a dask graph.
+
+    Unvaried fields of a systematic variation share the buffers of the
+    nominal fields, so a variation only counts as read, and only keeps its
+    branches in :meth:`minimal_branches`, if one of its varied branches was
+    read.
+    """
+
+    def add(self, branches: Iterable[str]) -> None:
+        """Record *branches* as read."""
+        self.extend(branches)
+
+    def branches(self) -> list[str]:
+        """Sorted names of the branches that were read."""
+        return sorted({getattr(entry, "branch", entry) for entry in self})
+
+    def _reader(self) -> Callable[[dict[str, Any]], bool]:
+        """Whether the buffer of a form node was read."""
+        keys = set()
+        for entry in self:
+            if hasattr(entry, "buffer_key"):
+                # buffer keys end in <attribute>/<form key>, with the attribute
+                # appended to the form key for buffers other than data
+                attribute, form_key = entry.buffer_key.rsplit("/", 2)[-2:]
+                keys.add(form_key.removesuffix(quote(f",!{attribute}")))
+        # branches recorded with add() carry no buffer key, so any use counts
+        added = {entry for entry in self if isinstance(entry, str)}
+        return lambda node: (
+            node.get("form_key") in keys
+            or bool(_branches(node.get("form_key")) & added)
+        )
+
+    def report(
+        self, events: Any, keep: Iterable[str] | None = None
+    ) -> dict[str, list[str]]:
+        """
+        Fields, systematics and branches the processor read from *events*.
+
+        Args:
+            events (NtupleEvents): the traced events
+            keep (Iterable[str] | None): branches to keep whenever the file has them, by default the :attr:`~atlas_schema.schema.NtupleSchema.event_ids` of the schema that built *events*
+
+        Returns:
+            dict: ``fields`` read (as ``collection.field`` or ``singleton``, whether nominal or varied), ``systematics`` whose varied branches were read, and the minimal ``branches`` to read them
+        """
+        form = events.attrs["@form"]
+        metadata = form.get("parameters", {}).get("metadata", {})
+        if keep is None:
+            keep = metadata.get("event_ids", NtupleSchema.event_ids)
+        systematics = set(metadata.get("systematics", []))
+        loaded = set(self.branches())
+        read = self._reader()
+
+        nodes = list(_walk(form))
+        present = set().union(*(_branches(node.get("form_key")) for _, node in nodes))
+        nominal = set().union(
+            *(
+                _branches(node.get("form_key"))
+                for path, node in nodes
+                if not path or path[0] not in systematics
+            )
+        )
+
+        by_path: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+        for path, node in nodes:
+            by_path.setdefault(path, []).append(node)
+
+        fields: set[str] = set()
+        touched_systematics: set[str] = set()
+        required = loaded | (present & set(keep))
+        for path, node in nodes:
+            if node["class"] != "RecordArray" or not path:
+                continue
+            # the list node holding a collection shares its path
+            touched = any(read(other) for other in by_path[path])
+            read_fields = [
+                field
+                for field, content in zip(node["fields"], node["contents"])
+                if _read_value(content, read)
+            ]
+            touched = touched or bool(read_fields)
+            name = path
+            if path[0] in systematics:
+                # unvaried fields share the nominal buffers, so a variation
+                # only counts as read through its varied branches
+                branches = set().union(
+                    *(_branches(child.get("form_key")) for _, child in _walk(node))
+                )
+                touched = touched and bool((branches - nominal) & loaded)
+                if touched:
+                    touched_systematics.add(path[0])
+                name = path[1:]
+            fields.update(".".join((*name, field)) for field in read_fields)
+            if not touched:
+                continue
+            for field, content in zip(node["fields"], node["contents"]):
+                if field in COORDINATE_FIELDS:
+                    required |= set().union(
+                        *(
+                            _branches(child.get("form_key"))
+                            for _, child in _walk(content)
+                        )
+                    )
+
+        # singletons
+        fields.update(
+            field
+            for field, content in zip(form["fields"], form["contents"])
+            if _read_value(content, read)
+        )
+
+        return {
+            "fields": sorted(fields),
+            "systematics": sorted(touched_systematics),
+            "branches": sorted(required),
+        }
+
+    def minimal_branches(
+        self, events: Any, keep: Iterable[str] | None = None
+    ) -> list[str]:
+        """
+        Smallest sorted list of branches to build *events* with the fields the processor read.
+
+        Besides the branches that were read, the list keeps the coordinates
+        of every collection the processor touched, which its vector behavior
+        needs to be built (they are only read if used), and the branches in
+        *keep* (by default the event IDs of the schema) that the file has.
+        Pass it as a branch filter in the next run.
+        """
+        return self.report(events, keep)["branches"]
+
+
+__all__ = ["COORDINATE_FIELDS", "AccessTrace"]
@@ -4,10 +4,24 @@ Tries to use coffea's built-in implementations first (available in coffea >=
 2026.5.0). Falls back to local copies for older versions, and patches them into
 ``coffea.nanoevents.transforms`` so the coffea mapping dispatcher can find the
 runtime functions via the ``!full_like_from_content`` form-key token.
+
+Forms built by :func:`full_like_form` instead use the
+``!constant_like_from_content`` token, registered the same way, which fills
+the array with a zero-stride view of a single value rather than a full buffer.
+
+Forms built by :func:`optional_form` read branches that only some files of a
+dataset have as option-typed arrays, with missing values in the other files.
 """
 
 from __future__ import annotations
 
+from typing import Any
+
+import awkward
+import numpy as np
+from coffea.nanoevents import transforms as _coffea_transforms
+from coffea.nanoevents.util import concat
+
 try:
     from coffea.nanoevents.transforms import (
         full_like_from_content,
@@ -16,10 +30,6 @@ try:
 except ImportError:
     import copy
 
-    import awkward
-    from coffea.nanoevents import transforms as _coffea_transforms
-    from coffea.nanoevents.util import concat
-
     def full_like_from_content_form(source_form: dict, fill_value: float) -> dict:
         form = copy.deepcopy(source_form)
         if not (
@@ -51,4 +61,246 @@ except ImportError:
     _coffea_transforms.full_like_from_content_form = full_like_from_content_form
     _coffea_transforms.full_like_from_content = full_like_from_content
 
-__all__ = ["full_like_from_content", "full_like_from_content_form"]
+
+def _without_doc(node: dict[str, Any], **changes: Any) -> dict[str, Any]:
+    """Shallow copy of a form node without its ``__doc__`` parameter."""
+    copied = {**node, **changes}
+    if "parameters" in node:
+        copied["parameters"] = {
+            k: v for k, v in node["parameters"].items() if k != "__doc__"
+        }
+    return copied
+
+
+def _constant_like(layout: awkward.contents.Content, fill_value: float) -> Any:
+    if isinstance(layout, awkward.contents.NumpyArray):
+        # every element is the same scalar: a zero-stride view instead of a buffer
+        data = np.broadcast_to(
+            np.asarray(fill_value, dtype=layout.dtype), layout.data.shape
+        )
+        return awkward.contents.NumpyArray(data, backend=layout.backend)
+    if isinstance(
+        layout,
+        (
+            awkward.contents.ListOffsetArray,
+            awkward.contents.ListArray,
+            awkward.contents.RegularArray,
+        ),
+    ):
+        return layout.copy(content=_constant_like(layout.content, fill_value))
+    return awkward.to_layout(awkward.full_like(layout, fill_value))
+
+
+def constant_like_from_content(stack: list[Any]) -> None:
+    """Fill an array shaped like the source with a single value
+
+    Like :func:`full_like_from_content`, but the data is a read-only,
+    zero-stride view of a single value, and the offsets are those of the
+    source. Materializing e.g. the electron mass then costs no memory beyond
+    the offsets the source already has.
+
+    Signature: source,fill_value,!constant_like_from_content
+    """
+    fill_value = float(stack.pop())
+    source = awkward.to_layout(stack.pop())
+    stack.append(_constant_like(source, fill_value))
+
+
+# Register with coffea's transforms module so the mapping dispatcher finds the
+# runtime function when decoding !constant_like_from_content form-key tokens.
+_coffea_transforms.constant_like_from_content = constant_like_from_content
+
+
+def full_like_form(
+    source_form: dict[str, Any],
+    fill_value: float,
+    memo: dict[tuple[str, float], dict[str, Any]] | None = None,
+) -> dict[str, Any]:
+    """Form of an array shaped like *source_form* and filled with *fill_value*.
+
+    Like :func:`full_like_from_content_form`, but evaluated with
+    :func:`constant_like_from_content`, and only the nodes that change are
+    copied: all other parts of the form are shared with *source_form*. When a
+    *memo* is given, the form built for a given source ``form_key`` and
+    *fill_value* is reused for later calls.
+
+    Args:
+        source_form (dict): form of the array to take the shape from (``NumpyArray`` or ``ListOffsetArray``)
+        fill_value (float): value to fill the array with
+        memo (dict): optional, forms already built, keyed by ``(form_key, fill_value)``
+
+    Returns:
+        dict: the form, to be treated as read-only since it can be shared
+    """
+    key = (source_form["form_key"], fill_value)
+    if memo is not None and key in memo:
+        return memo[key]
+    token = f"{fill_value},!constant_like_from_content"
+    if source_form["class"] == "NumpyArray":
+        form = _without_doc(
+            source_form, form_key=concat(source_form["form_key"], token)
+        )
+    elif source_form["class"].startswith("ListOffset"):
+        content = _without_doc(
+            source_form["content"],
+            form_key=concat(source_form["form_key"], token, "!content"),
+        )
+        form = _without_doc(source_form, content=content)
+    else:
+        msg = f"Cannot build a full_like form from a {source_form['class']}"
+        raise RuntimeError(msg)
+    if memo is not None:
+        memo[key] = form
+    return form
+
+
+def present_index(stack: list[Any]) -> None:
+    """Index of an option array in which every element of the source is present
+
+    Signature: source,!present_index
+    """
+    length = awkward.to_layout(stack.pop()).length
+    stack.append(np.arange(length, dtype=np.int64))
+
+
+def missing_index(stack: list[Any]) -> None:
+    """Index of an option array as long as the source, with every element missing
+
+    Signature: source,!missing_index
+    """
+    length = awkward.to_layout(stack.pop()).length
+    stack.append(np.full(length, -1, dtype=np.int64))
+
+
+def empty_of(stack: list[Any]) -> None:
+    """Empty array of the given dtype, the content of an all-missing option array
+
+    Signature: dtype,!empty_of
+    """
+    stack.append(np.empty(0, dtype=np.dtype(stack.pop())))
+
+
+def empty_lists_like(stack: list[Any]) -> None:
+    """Array of empty lists, as long as the source
+
+    Signature: source,!empty_lists_like
+    """
+    length = awkward.to_layout(stack.pop()).length
+    stack.append(
+        awkward.contents.ListOffsetArray(
+            awkward.index.Index64(np.zeros(length + 1, dtype=np.int64)),
+            awkward.contents.EmptyArray(),
+        )
+    )
+
+
+# Register with coffea's transforms module so the mapping dispatcher finds the
+# runtime functions of the placeholders of missing branches.
+_coffea_transforms.present_index = present_index
+_coffea_transforms.missing_index = missing_index
+_coffea_transforms.empty_of = empty_of
+_coffea_transforms.empty_lists_like = empty_lists_like
+
+
+def _option_form(content: dict[str, Any], index_key: str) -> dict[str, Any]:
+    return {
+        "class": "IndexedOptionArray",
+        "index": "i64",
+        "content": content,
+        "form_key": index_key,
+        "parameters": {},
+    }
+
+
+def optional_form(
+    template: dict[str, Any],
+    form: dict[str, Any] | None = None,
+    name: str | None = None,
+    offsets_key: str | None = None,
+) -> dict[str, Any]:
+    """Option-typed form of a branch that some files of a dataset do not have.
+
+    Files with the branch read its values as present; files without it read
+    missing values, shaped like other branches of the file. Either way the form
+    has the type of *template* wrapped in an option, ``?dtype`` for flat
+    branches and ``var * ?dtype`` for jagged ones, so that all files share a
+    single type.
+
+    Missing values take their length from the entry range of the source, by
+    loading the branch *name* as allowed to be missing, which reads nothing
+    from a file that does not have it. Only missing values of a jagged branch
+    shaped like a sibling branch read that sibling, for the number of values.
+
+    Args:
+        template (dict): form of the branch (``NumpyArray``, or ``ListOffsetArray`` of ``NumpyArray``), from a file that has it
+        form (dict | None): form of the branch in this file, or of a branch of this file with the same type to read instead, or ``None`` to read missing values
+        name (str): if *form* is ``None``, name of the branch, which this file does not have
+        offsets_key (str | None): if *form* is ``None``, form key of a jagged branch of the same collection to read the offsets from, or ``None`` for empty lists
+
+    Returns:
+        dict: the form
+    """
+    if template["class"] == "NumpyArray":
+        if form is not None:
+            content = {**template, "form_key": form["form_key"]}
+            index_key = concat(form["form_key"], "!present_index")
+            return _option_form(content, index_key)
+        content = {**template, "form_key": concat(template["primitive"], "!empty_of")}
+        return _option_form(content, concat(name, "!loadallowmissing", "!index"))
+
+    if not (
+        template["class"].startswith("ListOffset")
+        and template["content"]["class"] == "NumpyArray"
+    ):
+        msg = f"Cannot build an optional form of a {template['class']}"
+        raise RuntimeError(msg)
+    if form is not None:
+        content_key = form["content"]["form_key"]
+        content = {**template["content"], "form_key": content_key}
+        index_key = concat(content_key, "!present_index")
+        return {
+            **template,
+            "form_key": form["form_key"],
+            "content": _option_form(content, index_key),
+        }
+    if offsets_key is None:
+        offsets_key = concat(name, "!loadallowmissing", "!empty_lists_like")
+    content = {
+        **template["content"],
+        "form_key": concat(template["content"]["primitive"], "!empty_of"),
+    }
+    index_key = concat(offsets_key, "!content", "!missing_index")
+    return {
+        **template,
+        "form_key": offsets_key,
+        "content": _option_form(content, index_key),
+    }
+
+
+def share_offsets(form: dict[str, Any], nominal_form: dict[str, Any]) -> dict[str, Any]:
+    """Read the offsets of a systematic collection from its nominal collection.
+
+    Every variation of a collection has the same number of objects per event,
+    so the nominal offsets (and the buffer holding them) can be used for all of
+    them.
+    """
+    if (
+        form["class"].startswith("ListOffset")
+        and form["class"] == nominal_form["class"]
+    ):
+        form["form_key"] = nominal_form["form_key"]
+    return form
+
+
+__all__ = [
+    "constant_like_from_content",
+    "empty_lists_like",
+    "empty_of",
+    "full_like_form",
+    "full_like_from_content",
+    "full_like_from_content_form",
+    "missing_index",
+    "optional_form",
+    "present_index",
+    "share_offsets",
+]
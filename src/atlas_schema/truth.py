@@ -0,0 +1,180 @@
+"""Classification of truth particles from their MCTruthClassifier type and origin.
+
+A :class:`TruthClassifier` compiles rules on pairs of
+:class:`~atlas_schema.enums.ParticleType` and
+:class:`~atlas_schema.enums.ParticleOrigin` into a two-dimensional lookup
+table, so that classifying an array of particles is a single gather on the
+flat type and origin buffers, instead of a large boolean expression that
+builds an intermediate array for each comparison.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from typing import Union
+
+import numpy as np
+
+from atlas_schema.enums import ClassificationEnum, ParticleOrigin, ParticleType
+from atlas_schema.utils import Array, _lookup
+
+#: members (or their names) of an enum, or ``None`` for all of its values
+Members = Union[Iterable[Union[str, int]], None]
+
+
+def _indices(enum: type[ClassificationEnum], members: Members) -> list[int] | slice:
+    if members is None:
+        return slice(None)
+    return [int(enum.member(m)) for m in members]
+
+
+class TruthClassifier:
+    """
+    Map pairs of particle type and origin to class labels.
+
+    Each class is defined by rules, pairs of the types and the origins it
+    holds. A particle belongs to the first class with a rule matching its
+    type and origin, or to no class.
+
+    Args:
+        classes (Mapping[str, Iterable[tuple[Members, Members]]]): ``(types, origins)`` rules of each class label, where ``None`` stands for any type or origin
+        default (int): class index of particles that are in none of the classes
+
+    Example:
+        >>> import awkward as ak
+        >>> from atlas_schema.truth import TruthClassifier
+        >>> classifier = TruthClassifier(
+        ...     {
+        ...         "prompt": [(["IsoElectron", "IsoMuon"], None)],
+        ...         "fake": [(None, ["BottomMeson", "CharmedMeson"])],
+        ...     }
+        ... )
+        >>> types = ak.Array([[2, 3], [], [6]])
+        >>> origins = ak.Array([[12, 26], [], [13]])
+        >>> classifier(types, origins).to_list()
+        [[0, 1], [], [0]]
+        >>> classifier.mask(types, origins, "fake").to_list()
+        [[False, True], [], [False]]
+    """
+
+    def __init__(
+        self,
+        classes: Mapping[str, Iterable[tuple[Members, Members]]],
+        default: int = -1,
+    ) -> None:
+        self.labels: list[str] = list(classes)
+        self.default = default
+        table = np.full(
+            (max(ParticleType) + 1, max(ParticleOrigin) + 1), default, dtype=np.int64
+        )
+        # assign in reverse, so that the first class holding a pair wins
+        for index, rules in reversed(list(enumerate(classes.values()))):
+            for types, origins in reversed(list(rules)):
+                rows = _indices(ParticleType, types)
+                columns = _indices(ParticleOrigin, origins)
+                if isinstance(rows, list) and isinstance(columns, list):
+                    table[np.ix_(rows, columns)] = index
+                else:
+                    table[rows, columns] = index
+        table.setflags(write=False)
+        #: class index for each ``(type, origin)``
+        self.table = table
+        self._masks: dict[frozenset[int], np.ndarray] = {}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(labels={self.labels!r})"
+
+    def __call__(self, types: Array, origins: Array) -> Array:
+        """
+        Classify particles.
+
+        Args:
+            types (ak.Array | dask_awkward.Array): MCTruthClassifier types of the particles
+            origins (ak.Array | dask_awkward.Array): MCTruthClassifier origins of the particles
+
+        Returns:
+            ak.Array | dask_awkward.Array: index in :attr:`labels` of the class of each particle, or *default*
+        """
+        return _lookup(self.table, self.default, types, origins)
+
+    def mask(self, types: Array, origins: Array, *labels: str) -> Array:
+        """
+        Find the particles belonging to any of the classes *labels*.
+
+        Args:
+            types (ak.Array | dask_awkward.Array): MCTruthClassifier types of the particles
+            origins (ak.Array | dask_awkward.Array): MCTruthClassifier origins of the particles
+            labels (str): class labels
+
+        Returns:
+            ak.Array | dask_awkward.Array: boolean array, ``True`` for particles in any of the classes
+        """
+        key = frozenset(self.labels.index(label) for label in labels)
+        if key not in self._masks:
+            table = np.isin(self.table, list(key))
+            table.setflags(write=False)
+            self._masks[key] = table
+        return _lookup(self._masks[key], False, types, origins)
+
+
+_HEAVY_FLAVOUR_ORIGINS = [
+    "CharmedMeson",
+    "BottomMeson",
+    "CCbarMeson",
+    "JPsi",
+    "BBbarMeson",
+    "CharmedBaryon",
+    "BottomBaryon",
+]
+_LIGHT_FLAVOUR_ORIGINS = [
+    "LightMeson",
+    "StrangeMeson",
+    "LightBaryon",
+    "StrangeBaryon",
+    "PionDecay",
+    "KaonDecay",
+    "DalitzDec",
+]
+_NON_PROMPT_LEPTONS = [
+    "NonIsoElectron",
+    "BkgElectron",
+    "UnknownElectron",
+    "NonIsoMuon",
+    "BkgMuon",
+    "UnknownMuon",
+]
+
+#: Preset classes of leptons: prompt, from tau decays, from photon conversions,
+#: and from heavy or light flavour hadron decays
+LEPTONS = TruthClassifier(
+    {
+        "prompt": [(["IsoElectron", "IsoMuon"], None)],
+        "tau_decay": [(_NON_PROMPT_LEPTONS, ["TauLep"])],
+        "conversion": [(["BkgElectron"], ["PhotonConv", "ElMagProc"])],
+        "heavy_flavour": [(_NON_PROMPT_LEPTONS, _HEAVY_FLAVOUR_ORIGINS)],
+        "light_flavour": [(_NON_PROMPT_LEPTONS, _LIGHT_FLAVOUR_ORIGINS)],
+    }
+)
+
+#: Preset classes of photons: prompt, from hadron decays, and electrons
+PHOTONS = TruthClassifier(
+    {
+        "prompt": [
+            (["IsoPhoton"], None),
+            (
+                ["UnknownPhoton", "NonIsoPhoton", "BkgPhoton"],
+                ["PromptPhot", "FSRPhot", "ISRPhot", "UndrPhot"],
+            ),
+        ],
+        "hadron_decay": [
+            (
+                ["NonIsoPhoton", "BkgPhoton"],
+                ["PiZero", *_LIGHT_FLAVOUR_ORIGINS, *_HEAVY_FLAVOUR_ORIGINS],
+            )
+        ],
+        "electron": [(["IsoElectron", "NonIsoElectron", "BkgElectron"], None)],
+    }
+)
+
+
+__all__ = ["LEPTONS", "PHOTONS", "TruthClassifier"]
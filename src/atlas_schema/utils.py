@@ -1,13 +1,69 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import TypeVar, cast
+from typing import Any, TypeVar, cast
 
 import awkward as ak
+import numpy as np
 
 Array = TypeVar("Array", bound=ak.Array)
 _E = TypeVar("_E", bound=Enum)
 
+#: number of test elements above which membership is found with a binary search
+#: over the sorted test elements instead of comparing against each of them
+_ISIN_SORT_THRESHOLD = 32
+
+
+class _NotNumeric(Exception):
+    """Raised when an array cannot be tested for membership buffer by buffer."""
+
+
+def _contains(values: np.ndarray, test_elements: np.ndarray) -> np.ndarray:
+    """Element-wise membership of the flat *values* in the sorted, unique *test_elements*."""
+    if len(test_elements) == 0:
+        return np.zeros(len(values), dtype=np.bool_)
+    if len(test_elements) <= _ISIN_SORT_THRESHOLD:
+        result = np.zeros(len(values), dtype=np.bool_)
+        for test in test_elements:
+            result |= values == test
+        return result
+    index = np.searchsorted(test_elements, values)
+    index[index == len(test_elements)] = 0
+    return cast(np.ndarray, test_elements[index] == values)
+
+
+def _isin_buffers(element: Array, test_elements: np.ndarray) -> Array:
+    """Test membership on the flat content buffers of *element*, keeping its list structure."""
+
+    def membership(
+        layout: ak.contents.Content, **_kwargs: object
+    ) -> ak.contents.Content | None:
+        if layout.parameter("__array__") in ("string", "bytestring", "char", "byte"):
+            raise _NotNumeric
+        if layout.is_unknown:
+            return ak.contents.NumpyArray(np.zeros(layout.length, dtype=np.bool_))
+        if layout.is_option and (layout.content.is_numpy or layout.content.is_unknown):
+            # missing values are never found, as in the comparison with each test element
+            layout = layout.to_IndexedOptionArray64()
+            index = np.asarray(layout.index.data)
+            found = np.asarray(
+                cast(ak.contents.NumpyArray, membership(layout.content)).data
+            )
+            result = np.zeros(len(index), dtype=np.bool_)
+            result[index >= 0] = found[index[index >= 0]]
+            return ak.contents.NumpyArray(result)
+        if layout.is_numpy:
+            if layout.data.ndim != 1 or layout.dtype.kind not in "biuf":
+                raise _NotNumeric
+            return ak.contents.NumpyArray(
+                _contains(np.asarray(layout.data), test_elements)
+            )
+        if layout.is_record or layout.is_union:
+            raise _NotNumeric
+        return None
+
+    return cast(Array, ak.transform(membership, element, behavior=element.behavior))
+
 
 def isin(element: Array, test_elements: ak.Array, axis: int = -1) -> Array:
     """
@@ -15,17 +71,24 @@ def isin(element: Array, test_elements: ak.Array, axis: int = -1) -> Array:
 
     Calculates `element in test_elements`, broadcasting over *element elements only*. Returns a boolean array of the same shape as *element* that is `True` where an element of *element* is in *test_elements* and `False` otherwise.
 
-    This works by first transforming *test_elements* to an array with one more
-    dimension than the *element*, placing the *test_elements* at *axis*, and then doing a
-    comparison.
+    For numeric arrays tested along the last axis, membership is found directly on
+    the flat content buffer of *element*, which keeps its list structure: by
+    comparing to each of the test elements for small *test_elements*, and by a binary
+    search over the sorted *test_elements* otherwise. This does not build a temporary
+    array with one entry per element and test element. In all other cases, this works
+    by first transforming *test_elements* to an array with one more dimension than
+    the *element*, placing the *test_elements* at *axis*, and then doing a comparison.
+
+    For ``dask_awkward`` arrays, the *test_elements* are stored once in the task
+    graph, and membership is tested in a single task per partition.
 
     Args:
-        element (ak.Array): input array of values.
+        element (ak.Array | dask_awkward.Array): input array of values.
         test_elements (ak.Array): one-dimensional set of values against which to test each value of *element*.
         axis (int): the axis along which the comparison is performed
 
     Returns:
-        ak.Array: result of comparison for test_elements in *element*
+        ak.Array | dask_awkward.Array: result of comparison for test_elements in *element*
 
     Example:
         >>> import awkward as ak
@@ -39,6 +102,30 @@ def isin(element: Array, test_elements: ak.Array, axis: int = -1) -> Array:
     assert axis >= -1, "axis must be -1 or positive-valued"
     assert axis < element.ndim + 1, "axis too large for the element"
 
+    tests = _to_numpy(test_elements)
+    if type(element).__module__.startswith("dask_awkward"):
+        if tests is not None:
+            return _isin_dask(element, tests, axis)
+    elif (
+        tests is not None and tests.dtype.kind in "biuf" and axis in (-1, element.ndim)
+    ):
+        try:
+            return _isin_buffers(element, np.unique(tests))
+        except _NotNumeric:
+            pass
+    return _isin_broadcast(element, test_elements, axis)
+
+
+def _to_numpy(test_elements: ak.Array) -> np.ndarray | None:
+    """Return *test_elements* as a NumPy array, or ``None`` if they cannot be converted."""
+    try:
+        return cast(np.ndarray, ak.to_numpy(test_elements, allow_missing=False))
+    except (TypeError, ValueError):
+        return None
+
+
+def _isin_broadcast(element: Array, test_elements: ak.Array, axis: int) -> Array:
+    """Compare *element* to each of the *test_elements* placed at *axis*, and reduce."""
     # First, build up the transformation, with slice(None) indicating where to stick the test_elements
     reshaper: list[slice | None] = [None] * element.ndim
     axis = element.ndim if axis == -1 else axis
@@ -46,3 +133,154 @@ def isin(element: Array, test_elements: ak.Array, axis: int = -1) -> Array:
 
     # Note: reshaper needs to be a tuple for indexing purposes
     return cast(Array, ak.any(element == test_elements[tuple(reshaper)], axis=-1))
+
+
+def _isin_partition(partition: ak.Array, tests: np.ndarray, axis: int) -> ak.Array:
+    """Membership kernel applied to each partition of a dask array."""
+    if ak.backend(partition) == "typetracer":
+        # only the type of the result is needed, but all values are read
+        ak.typetracer.touch_data(partition)
+        result = isin(
+            ak.typetracer.length_zero_if_typetracer(partition), ak.Array(tests), axis
+        )
+        return ak.Array(
+            result.layout.to_typetracer(forget_length=True), behavior=result.behavior
+        )
+    return isin(partition, ak.Array(tests), axis)
+
+
+def _typetracer(array: Array) -> Array:
+    """Typetracer standing for the partitions of the ``dask_awkward`` *array*, built from its public properties."""
+    return cast(
+        Array, ak.Array(array.layout, behavior=array.behavior, attrs=array.attrs)
+    )
+
+
+def _isin_dask(element: Array, tests: np.ndarray, axis: int) -> Array:
+    """Test membership partition by partition, with the test elements stored once in the graph."""
+    import dask  # noqa: PLC0415  # pylint: disable=import-outside-toplevel
+    import dask_awkward  # noqa: PLC0415  # pylint: disable=import-outside-toplevel
+
+    if tests.dtype.kind in "biuf" and axis in (-1, element.ndim):
+        # sort once for the binary search in each partition; the original order
+        # only matters when broadcasting at another axis
+        tests = np.unique(tests)
+    return cast(
+        Array,
+        dask_awkward.map_partitions(  # type: ignore[attr-defined]
+            _isin_partition,
+            element,
+            dask.delayed(tests, pure=True),  # type: ignore[attr-defined]
+            axis,
+            label="isin",
+            meta=_isin_partition(_typetracer(element), tests, axis),
+        ),
+    )
+
+
+def _lookup(table: np.ndarray, fill: Any, *arrays: Array) -> Array:
+    """
+    Gather ``table[value, ...]`` for the values of *arrays*, which are broadcast together.
+
+    The gather is done once on the flat content buffers, and values outside
+    of *table* give *fill*. For ``dask_awkward`` arrays, this is done in a
+    single task per partition.
+    """
+    assert table.ndim == len(arrays), "one array is needed per table dimension"
+
+    if type(arrays[0]).__module__.startswith("dask_awkward"):
+        import dask_awkward  # noqa: PLC0415  # pylint: disable=import-outside-toplevel
+
+        return cast(
+            Array,
+            dask_awkward.map_partitions(  # type: ignore[attr-defined]
+                _lookup,
+                table,
+                fill,
+                *arrays,
+                label="lookup",
+                meta=_lookup(table, fill, *(_typetracer(array) for array in arrays)),
+            ),
+        )
+
+    # the last entry along each dimension holds the fill value
+    padded = np.full(tuple(n + 1 for n in table.shape), fill, dtype=table.dtype)
+    padded[tuple(slice(0, n) for n in table.shape)] = table
+
+    def gather(
+        inputs: ak.contents.Content | tuple[ak.contents.Content, ...],
+        **_kwargs: object,
+    ) -> ak.contents.Content | None:
+        layouts = (inputs,) if isinstance(inputs, ak.contents.Content) else inputs
+        if not all(layout.is_numpy for layout in layouts):
+            return None
+        for layout in layouts:
+            if layout.dtype.kind not in "iu":
+                msg = (
+                    f"cannot look up values of type {layout.dtype}, integers are needed"
+                )
+                raise TypeError(msg)
+        if any(layout.backend.name == "typetracer" for layout in layouts):
+            nplike = layouts[0].backend.nplike
+            return ak.contents.NumpyArray(
+                nplike.empty(layouts[0].length, dtype=table.dtype)
+            )
+        index = []
+        for layout, n in zip(layouts, table.shape):
+            values = np.asarray(layout.data)
+            index.append(np.where((values >= 0) & (values < n), values, n))
+        return ak.contents.NumpyArray(padded[tuple(index)])
+
+    for array in arrays:
+        if ak.backend(array) == "typetracer":
+            ak.typetracer.touch_data(array)
+    return cast(Array, ak.transform(gather, *arrays))
+
+
+def _bits_clear(masks: np.ndarray, fields: list[str], array: Array) -> Array:
+    """
+    Test ``array & mask == 0`` for all the integer *masks* at once, as a record with one field per mask.
+
+    The flat content buffer of *array* is compared against all *masks* in a
+    single broadcast operation. For ``dask_awkward`` arrays, this is done in a
+    single task per partition.
+    """
+    if type(array).__module__.startswith("dask_awkward"):
+        import dask_awkward  # noqa: PLC0415  # pylint: disable=import-outside-toplevel
+
+        return cast(
+            Array,
+            dask_awkward.map_partitions(  # type: ignore[attr-defined]
+                _bits_clear,
+                masks,
+                fields,
+                array,
+                label="bits_clear",
+                meta=_bits_clear(masks, fields, _typetracer(array)),
+            ),
+        )
+
+    def compare(
+        layout: ak.contents.Content, **_kwargs: object
+    ) -> ak.contents.Content | None:
+        if not layout.is_numpy:
+            return None
+        if layout.dtype.kind not in "iu":
+            msg = f"cannot test the bits of values of type {layout.dtype}, integers are needed"
+            raise TypeError(msg)
+        if layout.backend.name == "typetracer":
+            nplike = layout.backend.nplike
+            passed = [nplike.empty(layout.length, dtype=np.bool_) for _ in fields]
+        else:
+            # one row per mask, so that each field is a contiguous view
+            values = np.asarray(layout.data)
+            passed = list((masks.astype(values.dtype)[:, np.newaxis] & values) == 0)
+        return ak.contents.RecordArray(
+            [ak.contents.NumpyArray(column) for column in passed],
+            fields,
+            length=layout.length,
+        )
+
+    if ak.backend(array) == "typetracer":
+        ak.typetracer.touch_data(array)
+    return cast(Array, ak.transform(compare, array))
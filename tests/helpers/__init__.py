@@ -3,6 +3,13 @@ from __future__ import annotations
 from collections.abc import Iterator
 from contextlib import contextmanager
 from typing import Any, TypeVar
+from uuid import uuid4
+
+import awkward as ak
+from coffea.nanoevents import NanoEventsFactory
+from coffea.nanoevents.mapping import SimplePreloadedColumnSource
+
+from atlas_schema.schema import NtupleSchema
 
 AttrValue = TypeVar("AttrValue")
 
@@ -15,4 +22,31 @@ def attr_as(obj, field: str, value: Any) -> Iterator[AttrValue]:
     setattr(obj, field, old_value)
 
 
-__all__ = ["attr_as"]
+def jet_ntuple() -> dict[str, ak.Array]:
+    """Event IDs and a jet collection with one systematic variation, for three events."""
+    return {
+        "eventNumber": ak.Array([[1], [2], [3]]),
+        "runNumber": ak.Array([[1], [1], [1]]),
+        "lumiBlock": ak.Array([[1], [1], [1]]),
+        "mcChannelNumber": ak.Array([[1], [1], [1]]),
+        "actualInteractionsPerCrossing": ak.Array([[30], [30], [30]]),
+        "averageInteractionsPerCrossing": ak.Array([[35], [35], [35]]),
+        "dataTakingYear": ak.Array([[2018], [2018], [2018]]),
+        "mcEventWeights": ak.Array([[1.0], [1.0], [1.0]]),
+        "jet_pt_NOSYS": ak.Array([[10.0, 15.0], [], [12.5]]),
+        "jet_pt_JET_JER__1up": ak.Array([[11.0, 16.0], [], [13.5]]),
+        "jet_eta": ak.Array([[0.5, 1.8], [], [1.2]]),
+        "jet_phi": ak.Array([[0.01, 1.2], [], [0.8]]),
+        "jet_m": ak.Array([[125.0, 12.0], [], [83.0]]),
+    }
+
+
+def make_events(array: dict[str, ak.Array], schemaclass=NtupleSchema) -> ak.Array:
+    """Build eager events of three entries from the preloaded branches in *array*."""
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+    return NanoEventsFactory.from_preloaded(
+        src, metadata={"dataset": "test"}, schemaclass=schemaclass
+    ).events()
+
+
+__all__ = ["attr_as", "jet_ntuple", "make_events"]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import os
+from typing import ClassVar
+
+import awkward as ak
+import pytest
+from helpers import jet_ntuple, make_events
+
+from atlas_schema.cache import FormCache, fingerprint
+from atlas_schema.schema import NtupleSchema
+
+
+@pytest.fixture
+def array():
+    return jet_ntuple()
+
+
+def test_fingerprint_ignores_set_order():
+    assert fingerprint({"a", "b", "c"}) == fingerprint({"c", "b", "a"})
+    assert fingerprint({"a": 1, "b": 2}) == fingerprint({"b": 2, "a": 1})
+    assert fingerprint(["a", "b"]) != fingerprint(["b", "a"])
+
+
+def test_fingerprint_rejects_unknown_objects():
+    with pytest.raises(TypeError, match="not JSON serializable"):
+        fingerprint(object())
+
+
+def test_form_cache_roundtrip(tmp_path):
+    cache = FormCache(tmp_path / "cache", max_bytes=1024**2)
+    assert cache.get("missing") is None
+    cache.put("key", {"fields": ["a"], "contents": [{"class": "NumpyArray"}]})
+    assert cache.get("key") == {"fields": ["a"], "contents": [{"class": "NumpyArray"}]}
+    cache.clear()
+    assert cache.get("key") is None
+
+
+def test_form_cache_ignores_corrupt_entries(tmp_path):
+    cache = FormCache(tmp_path, max_bytes=1024**2)
+    cache._path("key").write_text("{not json", encoding="utf-8")
+    assert cache.get("key") is None
+
+
+def test_form_cache_evicts_least_recently_used(tmp_path):
+    payload = "x" * 100
+    cache = FormCache(tmp_path, max_bytes=250)
+    cache.put("a", payload)
+    cache.put("b", payload)
+    os.utime(cache._path("a"), (1, 1))
+    os.utime(cache._path("b"), (2, 2))
+    # reading 'a' makes it the most recently used entry
+    assert cache.get("a") == payload
+    cache.put("c", payload)
+    assert cache.get("b") is None
+    assert cache.get("a") == payload
+    assert cache.get("c") == payload
+    assert sum(size for _, size, _ in cache.entries()) <= 250
+
+
+def test_schema_cache_hit_skips_build(tmp_path, array, monkeypatch):
+    class CachedSchema(NtupleSchema):
+        cache_dir = tmp_path
+
+    events = make_events(array, CachedSchema)
+    assert len(FormCache(tmp_path, 1024**2).entries()) == 1
+
+    def fail(*_args, **_kwargs):
+        msg = "_build_collections should not be called on a cache hit"
+        raise AssertionError(msg)
+
+    monkeypatch.setattr(CachedSchema, "_build_collections", fail)
+    cached = make_events(array, CachedSchema)
+
+    assert cached.systematic_names == events.systematic_names
+    assert set(ak.fields(cached.jet)) == set(ak.fields(events.jet))
+    assert cached.JET_JER__1up.jet.pt.to_list() == [[11.0, 16.0], [], [13.5]]
+    assert ak.all(cached.jet.mass == events.jet.mass)
+
+
+def test_schema_cache_keyed_by_configuration(tmp_path, array):
+    class CachedSchema(NtupleSchema):
+        cache_dir = tmp_path
+
+    class OtherSchema(CachedSchema):
+        singletons: ClassVar[set[str]] = {"jet_m"}
+
+    make_events(array, CachedSchema)
+    make_events(array, CachedSchema.v1)
+    events = make_events(array, OtherSchema)
+
+    assert len(FormCache(tmp_path, 1024**2).entries()) == 3
+    assert "jet_m" in ak.fields(events)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Sequence
+from typing import Any
+
+import awkward as ak
+import numpy as np
+import pytest
+import uproot
+from coffea.nanoevents import NanoEventsFactory
+
+from atlas_schema.catalog import Catalog, build_catalog, scan_file
+from atlas_schema.schema import NtupleSchema
+
+
+def write_ntuple(
+    path: os.PathLike[str], systematics: list[str], event_ids: bool = True
+) -> str:
+    branches: dict[str, np.ndarray] = {}
+    if event_ids:
+        branches.update(
+            {name: np.arange(3, dtype=np.int64) for name in NtupleSchema.event_ids}
+        )
+        branches["mcEventWeights"] = np.ones(3)
+    branches["jet_pt_NOSYS"] = np.array([10.0, 15.0, 12.5])
+    branches["jet_eta"] = np.array([0.5, 1.8, 1.2])
+    for systematic in systematics:
+        branches[f"jet_pt_{systematic}"] = branches["jet_pt_NOSYS"]
+    with uproot.recreate(path) as file:
+        file["reco"] = branches
+    return str(path)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return [
+        write_ntuple(tmp_path / "a.root", ["JET_JER__1up", "JET_JES__1up"]),
+        write_ntuple(tmp_path / "b.root", ["JET_JER__1up"]),
+        write_ntuple(tmp_path / "c.root", [], event_ids=False),
+    ]
+
+
+def test_scan_file(paths):
+    entry = scan_file(paths[0])
+    assert entry["entries"] == 3
+    assert entry["systematics"] == ["JET_JER__1up", "JET_JES__1up"]
+    assert entry["collections"] == ["jet"]
+    assert entry["missing_event_ids"] == []
+    assert "jet_pt_NOSYS" in entry["branches"]
+
+    assert "error" in scan_file(paths[0], treepath="missing")
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_build_catalog(paths, tmp_path, max_workers):
+    catalog = build_catalog(
+        [*paths, tmp_path / "missing.root"], max_workers=max_workers
+    )
+    assert [entry["path"] for entry in catalog.files] == [
+        *paths,
+        str(tmp_path / "missing.root"),
+    ]
+    assert list(catalog.errors()) == [str(tmp_path / "missing.root")]
+
+    assert catalog.systematics() == ["JET_JER__1up", "JET_JES__1up"]
+    assert catalog.systematics(common=True) == []
+    assert catalog.files_with_systematic("JET_JES__1up") == [paths[0]]
+    assert list(catalog.missing_event_ids()) == [paths[2]]
+
+    assert not catalog.is_homogeneous()
+    assert len(catalog.groups()) == 3
+    assert catalog.heterogeneous_branches()["jet_pt_JET_JES__1up"] == paths[1:]
+
+    catalog.save(tmp_path / "catalog.json")
+    loaded = Catalog.load(tmp_path / "catalog.json")
+    assert loaded.to_dict() == catalog.to_dict()
+
+
+def test_build_catalog_with_derived_schema(paths):
+    schemaclass = NtupleSchema.with_systematics(exclude=["JET_JER_*"])
+    catalog = build_catalog(paths, schemaclass=schemaclass, max_workers=2)
+    assert list(catalog.errors()) == []
+    assert catalog.systematics() == ["JET_JES__1up"]
+
+
+def write_jagged_ntuple(
+    path: os.PathLike[str],
+    jet: dict[str, ak.Array] | None,
+    flat: Sequence[str] = (),
+) -> str:
+    types = {"eventNumber": "int64", **dict.fromkeys(flat, "float64")}
+    data = {"eventNumber": np.arange(3), **{name: np.arange(3.0) for name in flat}}
+    if jet:
+        types["jet"] = ak.zip(jet).type.content
+        data["jet"] = ak.zip(jet)
+    with uproot.recreate(path) as file:
+        file.mktree(
+            "reco",
+            types,
+            counter_name=lambda counted: f"n{counted}",
+            field_name=lambda outer, inner: f"{outer}_{inner}",
+        )
+        file["reco"].extend(data)
+    return str(path)
+
+
+@pytest.fixture
+def jagged_paths(tmp_path):
+    pt = ak.Array([[10.0, 20.0], [], [30.0]])
+    jet = {"pt_NOSYS": pt, "eta": pt / 10, "phi": pt / 100, "m": pt}
+    return [
+        write_jagged_ntuple(
+            tmp_path / "a.root", {**jet, "pt_JES__1up": pt + 1}, ["extra"]
+        ),
+        write_jagged_ntuple(tmp_path / "b.root", jet),
+        write_jagged_ntuple(tmp_path / "c.root", None),
+    ]
+
+
+def read_events(path: str, schemaclass: type[NtupleSchema]) -> ak.Array:
+    return NanoEventsFactory.from_root(
+        {path: "reco"}, schemaclass=schemaclass, mode="eager"
+    ).events()
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_catalog_schema_union(jagged_paths):
+    schemaclass = build_catalog(jagged_paths, max_workers=1).schema("union")
+    a, b, c = (read_events(path, schemaclass) for path in jagged_paths)
+
+    assert a.extra.tolist() == [0.0, 1.0, 2.0]
+    assert b.extra.tolist() == [None, None, None]
+    assert a.JES__1up.jet.pt.tolist() == [[11.0, 21.0], [], [31.0]]
+    # a missing systematic variation reads the nominal values
+    assert b.JES__1up.jet.pt.tolist() == [[10.0, 20.0], [], [30.0]]
+    # a missing collection reads empty lists
+    assert c.jet.pt.tolist() == [[], [], []]
+    assert str(a.jet.pt.type) == str(b.jet.pt.type) == str(c.jet.pt.type)
+    assert str(a.extra.type) == str(c.extra.type)
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_catalog_schema_union_missing_reads_nothing(jagged_paths):
+    schemaclass = build_catalog(jagged_paths, max_workers=1).schema("union")
+    access_log: list[Any] = []
+    events = NanoEventsFactory.from_root(
+        {jagged_paths[1]: "reco"},
+        schemaclass=schemaclass,
+        mode="virtual",
+        access_log=access_log,
+    ).events()
+
+    # the missing values take their length from the entry range
+    assert events.extra.tolist() == [None, None, None]
+    assert {accessed.branch for accessed in access_log} == {"extra"}
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_catalog_schema_intersection(jagged_paths):
+    catalog = build_catalog(jagged_paths[:2], max_workers=1)
+    schemaclass = catalog.schema("intersection")
+    a, b = (read_events(path, schemaclass) for path in jagged_paths[:2])
+
+    assert a.fields == b.fields
+    assert "extra" not in a.fields
+    assert a.metadata["systematics"] == b.metadata["systematics"] == []
+    assert b.jet.pt.tolist() == [[10.0, 20.0], [], [30.0]]
+
+    with pytest.raises(ValueError, match="Unknown mode"):
+        catalog.schema("all")  # type: ignore[arg-type]
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from enum import IntEnum
 
+import awkward as ak
+import pytest
+
 import atlas_schema as ats
 
 
@@ -17,3 +21,65 @@ def test_enum_multiple_access():
     assert Names["Alice", "Bob"] == [Names.Alice, Names.Bob]  # type:ignore[misc,comparison-overlap]
     assert Names["Bob", "Alice"] == [Names.Bob, Names.Alice]  # type: ignore[unreachable]
     assert Names["Charlie", "Alice", "Bob"] == [Names.Charlie, Names.Alice, Names.Bob]
+
+
+def test_photonid_mask():
+    assert ats.PhotonID.mask([]) == 0
+    assert ats.PhotonID.mask([ats.PhotonID.Rhad]) == 1 << 10
+    assert ats.PhotonID.mask(["Reta", ats.PhotonID.Rhad, "Reta"]) == (1 << 10) | (
+        1 << 12
+    )
+    words: list[ats.PhotonID] = ats.PhotonID["Rhad", "Reta"]  # type:ignore[misc,assignment]
+    assert ats.PhotonID.mask(words) == ats.PhotonID.mask(["Reta", "Rhad"])
+
+
+def test_classification_mask():
+    origins = ak.Array([[12, 13, 26], [], [14, 99, -1], None])
+    result = [[True, True, False], [], [False, False, False], None]
+    assert (
+        ats.ParticleOrigin.mask(origins, "WBoson", ats.ParticleOrigin.ZBoson).to_list()
+        == result
+    )
+    assert ats.ParticleOrigin.mask(origins).to_list() == [
+        [False, False, False],
+        [],
+        [False, False, False],
+        None,
+    ]
+    assert (
+        ats.ParticleOrigin.mask(ak.values_astype(origins, "uint8"), 12, 13).to_list()
+        == result
+    )
+
+
+def test_classification_category():
+    types = ak.Array([[2, 6, 3], [17], []])
+    categories: dict[str, Iterable[str | int]] = {
+        "iso": ats.enums.ParticleType["IsoElectron", "IsoMuon"],  # type:ignore[misc,dict-item]
+        "electron": ["UnknownElectron", "IsoElectron", "NonIsoElectron"],
+    }
+    # the first category holding a member wins
+    assert ats.enums.ParticleType.category(types, categories).to_list() == [
+        [0, 0, 1],
+        [-1],
+        [],
+    ]
+    assert ats.enums.ParticleType.category(
+        types, list(categories.values()), default=9
+    ).to_list() == [[0, 0, 1], [9], []]
+    with pytest.raises(TypeError, match="integers are needed"):
+        ats.enums.ParticleType.category(types * 1.0)
+
+
+def test_classification_dask():
+    dak = pytest.importorskip("dask_awkward")
+    origins = ak.Array([[12, 13, 26], [], [14, 99], [43]])
+    dorigins = dak.from_awkward(origins, npartitions=2)
+    assert (
+        ats.ParticleOrigin.mask(dorigins, "WBoson", "DiBoson").compute().to_list()
+        == ats.ParticleOrigin.mask(origins, "WBoson", "DiBoson").to_list()
+    )
+    assert (
+        ats.ParticleOrigin.category(dorigins).compute().to_list()
+        == ats.ParticleOrigin.category(origins).to_list()
+    )
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+import tracemalloc
+from typing import ClassVar
+
+import pytest
+from helpers import jet_ntuple, make_events
+
+from atlas_schema.profiling import BuildProfile, format_report
+from atlas_schema.schema import NtupleSchema
+
+
+@pytest.fixture
+def array():
+    return jet_ntuple()
+
+
+def test_build_profile_disabled():
+    profile = BuildProfile(enabled=False)
+    with profile.phase("parse"):
+        pass
+    profile.count(branches=1)
+    assert profile.to_dict() == {"phases": {}, "counts": {}, "seconds": 0}
+
+
+def test_build_profile_restores_tracing():
+    profile = BuildProfile()
+    with profile.phase("parse"):
+        # allocated and freed within the phase, still part of its peak
+        data = bytearray(1_000_000)
+        del data
+    assert not tracemalloc.is_tracing()
+    assert 1_000_000 <= profile.phases["parse"]["peak_bytes"] < 1_100_000
+
+
+def test_schema_profile(array):
+    class ProfiledSchema(NtupleSchema):
+        profile_build: ClassVar[bool] = True
+
+    events = make_events(array, ProfiledSchema)
+    report = events.metadata["profile"]
+    assert list(report["phases"]) == [
+        "resolve_collections",
+        "nosys_rename",
+        "discover_systematics",
+        "classify_branches",
+        "nominal",
+        "systematics",
+        "singletons",
+    ]
+    assert report["counts"] == {
+        "branches": len(array),
+        "collections": 1,
+        "systematics": 1,
+        "cached": 0,
+    }
+    # the report is stored as plain, serializable metadata
+    assert json.loads(json.dumps(report)) == report
+    assert "discover_systematics" in format_report(report)
+
+    assert "profile" not in make_events(array, NtupleSchema).metadata
+
+
+def test_schema_profile_cached(array, tmp_path):
+    class ProfiledSchema(NtupleSchema):
+        profile_build: ClassVar[bool] = True
+        cache_dir: ClassVar[str] = str(tmp_path)
+
+    assert (
+        "cache_store"
+        in make_events(array, ProfiledSchema).metadata["profile"]["phases"]
+    )
+
+    report = make_events(array, ProfiledSchema).metadata["profile"]
+    assert list(report["phases"]) == ["cache_lookup"]
+    assert report["counts"]["cached"] == 1
+
+
+def test_build_profile_keeps_caller_tracing():
+    tracemalloc.start()
+    try:
+        data = bytearray(1_000_000)
+        del data
+        peak = tracemalloc.get_traced_memory()[1]
+        profile = BuildProfile()
+        with profile.phase("parse"):
+            transient = bytearray(1_000_000)
+            del transient
+            kept = bytearray(100_000)
+        assert tracemalloc.is_tracing()
+        # the peak of the caller is not reset by the phase
+        assert tracemalloc.get_traced_memory()[1] >= peak
+        # only the memory still held at the end of the phase is counted
+        assert "peak_bytes" not in profile.phases["parse"]
+        assert 100_000 <= profile.phases["parse"]["growth_bytes"] < 150_000
+        assert "+: net growth" in str(profile)
+        del kept
+    finally:
+        tracemalloc.stop()
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import difflib
+import gc
+import warnings
+import weakref
 from typing import ClassVar
 from uuid import uuid4
 
@@ -10,6 +14,8 @@ from coffea.nanoevents.mapping import SimplePreloadedColumnSource
 from coffea.nanoevents.methods.base import NanoCollection, NanoCollectionArray
 from helpers import attr_as
 
+from atlas_schema.branches import closest_behavior
+from atlas_schema.enums import PhotonID
 from atlas_schema.methods import JetArray, JetRecord  # type:ignore[attr-defined]
 from atlas_schema.schema import NtupleSchema
 
@@ -225,6 +231,38 @@ def test_underscored_mixin(event_id_fields):
     assert "recojet_antikt10UFO" in ak.fields(events)
 
 
+def test_underscored_mixin_longest_match(event_id_fields, jet_array_fields):
+    array = {
+        **event_id_fields,
+        **jet_array_fields,
+        "jet_large_pt": ak.Array([[100.0], [200.0], []]),
+        "jet_large_eta": ak.Array([[0.1], [0.2], []]),
+        "jet_large_phi": ak.Array([[0.3], [0.4], []]),
+        "jet_large_m": ak.Array([[80.0], [90.0], []]),
+    }
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+
+    class MySchema(NtupleSchema):
+        mixins: ClassVar[dict[str, str]] = {
+            "jet_large": "Jet",
+            **NtupleSchema.mixins,
+        }
+
+    with warnings.catch_warnings(record=True) as record:
+        warnings.simplefilter("always")
+        events = NanoEventsFactory.from_preloaded(
+            src, metadata={"dataset": "test"}, schemaclass=MySchema
+        ).events()
+
+    messages = [str(w.message) for w in record]
+    assert any("[mixin-underscore]" in message for message in messages)
+    # jet still has branches of its own, so it is not misidentified
+    assert not any("[collection-subset]" in message for message in messages)
+    assert {"jet", "jet_large"} <= set(ak.fields(events))
+    assert "large_pt" not in ak.fields(events.jet)
+    assert events.jet_large.pt.tolist() == [[100.0], [200.0], []]
+
+
 def test_undefined_singleton(event_id_fields):
     array = {
         **event_id_fields,
@@ -254,6 +292,30 @@ def test_undefined_singleton(event_id_fields):
     assert "singleton" in ak.fields(events)
 
 
+def test_undefined_singletons_summarized(event_id_fields):
+    array = {
+        **event_id_fields,
+        **{f"singleton{i}": ak.Array([[i], [i], [i]]) for i in range(20)},
+    }
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+
+    with warnings.catch_warnings(record=True) as record:
+        warnings.simplefilter("always")
+        events = NanoEventsFactory.from_preloaded(
+            src, metadata={"dataset": "test"}, schemaclass=NtupleSchema
+        ).events()
+
+    messages = [
+        str(w.message) for w in record if "[singleton-undefined]" in str(w.message)
+    ]
+    assert len(messages) == 1
+    assert "'singleton0'" in messages[0]
+    assert "19 more like this: 'singleton1'" in messages[0]
+    assert events.metadata["diagnostics"]["singleton-undefined"] == [
+        f"singleton{i}" for i in range(20)
+    ]
+
+
 def test_singleton_branch_with_NOSYS(event_id_fields):
     array = {
         **event_id_fields,
@@ -301,3 +363,82 @@ def test_extra_singleton(event_id_fields):
         ).events()
 
     assert "singleton" not in ak.fields(events)
+
+
+def test_photon_isEM_working_points(event_id_fields):
+    array = {
+        **event_id_fields,
+        "ph_pt_NOSYS": ak.Array([[80.0, 90.0], [], [100.0]]),
+        "ph_eta": ak.Array([[0.5, 1.0], [], [1.2]]),
+        "ph_phi": ak.Array([[0.1, 3.0], [], [0.8]]),
+        "ph_isEM_syst_NOSYS": ak.Array(
+            [[0, 1 << PhotonID.Rhad], [], [(1 << PhotonID.Reta) | (1 << PhotonID.Ws3)]]
+        ),
+    }
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+    events = NanoEventsFactory.from_preloaded(
+        src, metadata={"dataset": "test"}, schemaclass=NtupleSchema
+    ).events()
+
+    assert events.ph.isEM.to_list() == [[True, False], [], [False]]
+    assert events.ph.pass_isEM([PhotonID.Rhad]).to_list() == [[True, False], [], [True]]
+
+    passed = events.ph.pass_isEM_working_points(
+        {
+            "rhad": [PhotonID.Rhad],
+            "strips": PhotonID["Ws3", "ERatio"],  # type:ignore[misc]
+            "none": [],
+        }
+    )
+    assert ak.fields(passed) == ["rhad", "strips", "none"]
+    assert passed.rhad.to_list() == events.ph.pass_isEM([PhotonID.Rhad]).to_list()
+    assert passed.strips.to_list() == [[True, True], [], [False]]
+    assert passed.none.to_list() == [[True, True], [], [True]]
+
+
+def test_suggested_behavior_cached(monkeypatch):
+    calls = []
+    get_close_matches = difflib.get_close_matches
+
+    def counting(*args, **kwargs):
+        calls.append(args[0])
+        return get_close_matches(*args, **kwargs)
+
+    class CachedSchema(NtupleSchema):
+        pass
+
+    closest_behavior.cache_clear()
+    monkeypatch.setattr(difflib, "get_close_matches", counting)
+    assert CachedSchema.suggested_behavior("SignalElectron") == "Electron"
+    assert CachedSchema.suggested_behavior("SignalElectron") == "Electron"
+    assert calls == ["signalelectron"]
+
+    # a different cutoff is matched again
+    assert CachedSchema.suggested_behavior("SignalElectron", cutoff=1.0) == (
+        CachedSchema.default_behavior
+    )
+    assert calls == ["signalelectron", "signalelectron"]
+
+    # the cache is shared by classes with the same behaviors, and does not keep them alive
+    assert NtupleSchema.suggested_behavior("SignalElectron") == "Electron"
+    assert len(calls) == 2
+    ref = weakref.ref(CachedSchema)
+    del CachedSchema
+    gc.collect()
+    assert ref() is None
+
+
+def test_behavior_names_collected_once_per_class(monkeypatch):
+    class CachedSchema(NtupleSchema):
+        pass
+
+    # pylint: disable=protected-access
+    names = CachedSchema._behavior_names()
+    assert "Electron" in names
+    assert CachedSchema._behavior_names() is names
+
+    # behaviors registered in the meantime are picked up
+    behavior = dict(CachedSchema.behavior())
+    behavior["Graviton"] = object
+    monkeypatch.setattr(CachedSchema, "behavior", classmethod(lambda _: behavior))
+    assert "Graviton" in CachedSchema._behavior_names()
@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
+import gc
+import pickle
+import weakref
 from uuid import uuid4
 
 import awkward as ak
+import numpy as np
 import pytest
+import uproot
 from coffea.nanoevents import NanoEventsFactory
 from coffea.nanoevents.mapping import SimplePreloadedColumnSource
 
+from atlas_schema.methods import iter_systematics, systematic_view
 from atlas_schema.schema import NtupleSchema
 
 
@@ -353,3 +359,457 @@ def test_getitem_with_boolean_mask(event_id_fields, systematic_variation_fields)
     # Test with systematic variation
     syst_events = events["JET_EnergyResolution__1up"]
     assert syst_events is not events, "Systematic variation should be different object"
+
+
+def test_systematic_values_from_branch_index(
+    event_id_fields, systematic_variation_fields
+):
+    """Each variation picks up its own varied branches and falls back to nominal otherwise."""
+    array = {**event_id_fields, **systematic_variation_fields}
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+    events = NanoEventsFactory.from_preloaded(
+        src, metadata={"dataset": "test_index"}, schemaclass=NtupleSchema
+    ).events()
+
+    jer = events["JET_EnergyResolution__1up"]
+    assert jer.jet.pt.to_list() == [[105.0, 155.0], [], [130.0]]
+    assert jer.jet.eta.to_list() == events.jet.eta.to_list()
+    assert jer.el.pt.to_list() == events.el.pt.to_list()
+
+    eg = events["EG_RESOLUTION_ALL__1up"]
+    assert eg.el.pt.to_list() == [[52.0], [62.0], []]
+    assert eg.jet.pt.to_list() == events.jet.pt.to_list()
+    assert eg.mu.pt.to_list() == events.mu.pt.to_list()
+
+
+def test_discover_systematics_prefers_longest_subcollection(event_id_fields):
+    """'jet_select_btag_NOSYS' is the 'select_btag' subcollection, not a 'btag_NOSYS' systematic of 'select'."""
+    array = {
+        **event_id_fields,
+        "jet_pt_NOSYS": ak.Array([[10.0, 15.0], [], [12.5]]),
+        "jet_eta": ak.Array([[0.5, 1.8], [], [1.2]]),
+        "jet_phi": ak.Array([[0.01, 1.2], [], [0.8]]),
+        "jet_m": ak.Array([[125.0, 12.0], [], [83.0]]),
+        "jet_select_NOSYS": ak.Array([[1, 0], [], [1]]),
+        "jet_select_btag_NOSYS": ak.Array([[0, 1], [], [1]]),
+        "jet_select_btag_FT_EFF_B_0__1up": ak.Array([[1, 1], [], [1]]),
+    }
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+    events = NanoEventsFactory.from_preloaded(
+        src, metadata={"dataset": "test_longest"}, schemaclass=NtupleSchema
+    ).events()
+
+    assert events.systematic_names == ["NOSYS", "FT_EFF_B_0__1up"]
+    assert set(ak.fields(events.jet)) == {
+        "pt",
+        "eta",
+        "phi",
+        "mass",
+        "select",
+        "select_btag",
+    }
+    assert events.FT_EFF_B_0__1up.jet.select_btag.to_list() == [[1, 1], [], [1]]
+
+
+def test_lazy_systematics_match_eager(event_id_fields, systematic_variation_fields):
+    """Lazily assembled variations hold the same collections and values as eagerly built ones."""
+
+    class LazySchema(NtupleSchema):
+        lazy_systematics = True
+
+    array = {**event_id_fields, **systematic_variation_fields}
+    events = {}
+    for schemaclass in (NtupleSchema, LazySchema):
+        src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+        events[schemaclass] = NanoEventsFactory.from_preloaded(
+            src, metadata={"dataset": "test_lazy"}, schemaclass=schemaclass
+        ).events()
+    eager, lazy = events[NtupleSchema], events[LazySchema]
+
+    assert lazy.systematic_names == eager.systematic_names
+    # only the varied fields are stored in the form
+    assert ak.fields(ak.Array.__getitem__(lazy, "JET_EnergyResolution__1up")) == ["jet"]
+    assert ak.fields(ak.Array.__getitem__(lazy, "JET_EnergyResolution__1up").jet) == [
+        "pt"
+    ]
+
+    for name in eager.systematic_names[1:]:
+        lazy_syst, eager_syst = lazy[name], eager[name]
+        assert lazy[name] is lazy_syst
+        assert lazy_syst.metadata == eager_syst.metadata
+        assert set(ak.fields(lazy_syst)) == set(ak.fields(eager_syst))
+        for collection in ak.fields(eager_syst):
+            assert type(lazy_syst[collection]) is type(eager_syst[collection])
+            assert set(ak.fields(lazy_syst[collection])) == set(
+                ak.fields(eager_syst[collection])
+            )
+            assert ak.all(lazy_syst[collection].pt == eager_syst[collection].pt)
+
+    masked = lazy[ak.Array([True, False, True])]
+    assert masked.JET_EnergyResolution__1up.jet.pt.to_list() == [
+        [105.0, 155.0],
+        [130.0],
+    ]
+    assert masked.JET_EnergyResolution__1up.jet.eta.to_list() == [[0.5, 1.8], [1.2]]
+
+
+def test_with_systematics_selects_variations(event_id_fields):
+    """Systematics outside the include/exclude selection never enter the form."""
+    array = {
+        **event_id_fields,
+        "jet_pt_NOSYS": ak.Array([[10.0, 15.0], [], [12.5]]),
+        "jet_pt_JET_JER__1up": ak.Array([[11.0, 16.0], [], [13.5]]),
+        "jet_pt_JET_JER__1down": ak.Array([[9.0, 14.0], [], [11.5]]),
+        "jet_pt_JET_JES__1up": ak.Array([[12.0, 17.0], [], [14.5]]),
+        "jet_eta": ak.Array([[0.5, 1.8], [], [1.2]]),
+        "jet_phi": ak.Array([[0.01, 1.2], [], [0.8]]),
+        "jet_m": ak.Array([[125.0, 12.0], [], [83.0]]),
+        "el_pt_NOSYS": ak.Array([[50.0], [60.0], []]),
+        "el_pt_EG_SCALE__1up": ak.Array([[52.0], [62.0], []]),
+        "el_eta": ak.Array([[1.0], [1.5], []]),
+        "el_phi": ak.Array([[0.5], [1.0], []]),
+    }
+    schemaclass = NtupleSchema.with_systematics(include=["JET_*"], exclude=["*__1down"])
+    assert issubclass(schemaclass, NtupleSchema)
+    assert NtupleSchema.systematics_include is None
+
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+    events = NanoEventsFactory.from_preloaded(
+        src, metadata={"dataset": "test_select"}, schemaclass=schemaclass
+    ).events()
+
+    assert events.systematic_names == ["NOSYS", "JET_JER__1up", "JET_JES__1up"]
+    assert "JET_JER__1down" not in ak.fields(events)
+    assert "EG_SCALE__1up" not in ak.fields(events)
+    # dropped variations are not picked up as nominal fields either
+    assert set(ak.fields(events.jet)) == {"pt", "eta", "phi", "mass"}
+    assert set(ak.fields(events.el)) == {"pt", "eta", "phi", "mass"}
+    assert events.JET_JES__1up.jet.pt.to_list() == [[12.0, 17.0], [], [14.5]]
+
+
+def test_with_branch_filter_drops_branches(event_id_fields):
+    """Branches outside the include/exclude selection never enter the form."""
+    array = {
+        **event_id_fields,
+        "jet_pt_NOSYS": ak.Array([[10.0, 15.0], [], [12.5]]),
+        "jet_pt_JET_JER__1up": ak.Array([[11.0, 16.0], [], [13.5]]),
+        "jet_pt_JET_JES__1up": ak.Array([[12.0, 17.0], [], [14.5]]),
+        "jet_eta": ak.Array([[0.5, 1.8], [], [1.2]]),
+        "jet_phi": ak.Array([[0.01, 1.2], [], [0.8]]),
+        "jet_m": ak.Array([[125.0, 12.0], [], [83.0]]),
+        "jet_btag": ak.Array([[1, 0], [], [1]]),
+        "el_pt_NOSYS": ak.Array([[50.0], [60.0], []]),
+        "el_pt_EG_SCALE__1up": ak.Array([[52.0], [62.0], []]),
+        "el_eta": ak.Array([[1.0], [1.5], []]),
+        "el_phi": ak.Array([[0.5], [1.0], []]),
+        "RandomRunNumber": ak.Array([1, 2, 3]),
+    }
+    schemaclass = NtupleSchema.with_branch_filter(
+        include=["jet_*"], exclude=["jet_btag", "*_JET_JES__*", "mcEventWeights"]
+    )
+    assert issubclass(schemaclass, NtupleSchema)
+    assert NtupleSchema.branches_include is None
+
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+    with pytest.warns(
+        RuntimeWarning, match=r"Missing event_ids : \['mcEventWeights'\]"
+    ):
+        events = NanoEventsFactory.from_preloaded(
+            src, metadata={"dataset": "test_filter"}, schemaclass=schemaclass
+        ).events()
+
+    assert events.systematic_names == ["NOSYS", "JET_JER__1up"]
+    assert set(ak.fields(events.jet)) == {"pt", "eta", "phi", "mass"}
+    assert "el" not in ak.fields(events)
+    assert "RandomRunNumber" not in ak.fields(events)
+    # event IDs are kept unless excluded
+    assert "eventNumber" in ak.fields(events)
+    assert "mcEventWeights" not in ak.fields(events)
+    assert events.JET_JER__1up.jet.pt.to_list() == [[11.0, 16.0], [], [13.5]]
+
+
+def test_derived_schemas_pickle():
+    derived = [
+        NtupleSchema._nominal_class(),  # pylint: disable=protected-access
+        NtupleSchema.with_systematics(include=["JET_*"], exclude=["JET_JER_*"]),
+        NtupleSchema.with_branch_filter(exclude=["trig*"]).with_systematics(),
+        NtupleSchema.with_branches({"el_pt_NOSYS": {}}, optional=["el_pt_NOSYS"]),
+    ]
+    for schemaclass in derived:
+        restored = pickle.loads(pickle.dumps(schemaclass))
+        assert issubclass(restored, NtupleSchema)
+        for name in (
+            "nominal_only",
+            "systematics_include",
+            "systematics_exclude",
+            "branches_include",
+            "branches_exclude",
+            "fileset_branches",
+            "fileset_optional",
+        ):
+            assert getattr(restored, name) == getattr(schemaclass, name)
+
+    # the nominal schema is cached, so it is restored as the very same class
+    assert pickle.loads(pickle.dumps(derived[0])) is derived[0]
+
+
+def test_nominal_skips_systematics(event_id_fields, systematic_variation_fields):
+    """NtupleSchema.nominal builds the same nominal events without any variation."""
+    array = {**event_id_fields, **systematic_variation_fields}
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+    full = NanoEventsFactory.from_preloaded(
+        src, metadata={"dataset": "test_full"}, schemaclass=NtupleSchema
+    ).events()
+    events = NanoEventsFactory.from_preloaded(
+        src, metadata={"dataset": "test_nominal"}, schemaclass=NtupleSchema.nominal
+    ).events()
+
+    assert events.systematic_names == ["NOSYS"]
+    assert events.metadata["varied"] == {}
+    assert not any(field in ak.fields(events) for field in full.systematic_names[1:])
+    for collection in full.metadata["collections"]:
+        assert ak.fields(events[collection]) == ak.fields(full[collection])
+        assert events[collection].to_list() == full[collection].to_list()
+    assert NtupleSchema.nominal_only is False
+
+
+def test_systematics_share_nominal_buffers(
+    event_id_fields, systematic_variation_fields
+):
+    """Unvaried fields and offsets of a variation are the very same buffers as nominal."""
+    array = {**event_id_fields, **systematic_variation_fields}
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+    events = NanoEventsFactory.from_preloaded(
+        src, metadata={"dataset": "test_buffers"}, schemaclass=NtupleSchema
+    ).events()
+
+    assert events.metadata["varied"]["JET_EnergyResolution__1up"] == {"jet": ["pt"]}
+    assert events.metadata["varied"]["EG_RESOLUTION_ALL__1up"] == {"el": ["pt"]}
+
+    syst = events.JET_EnergyResolution__1up
+    nominal_jet, syst_jet = ak.to_layout(events.jet), ak.to_layout(syst.jet)
+    assert syst_jet.offsets.data is nominal_jet.offsets.data
+    for field in ("eta", "phi", "mass"):
+        assert syst_jet.content[field].data is nominal_jet.content[field].data
+    assert syst_jet.content["pt"].data is not nominal_jet.content["pt"].data
+    assert syst.jet.pt.to_list() == [[105.0, 155.0], [], [130.0]]
+
+    # collections without any variation are the nominal collections themselves
+    assert ak.to_layout(syst.el) is ak.to_layout(events.el)
+    assert ak.to_layout(syst.mu) is ak.to_layout(events.mu)
+
+
+def test_map_systematics_reuses_unaffected_results(
+    event_id_fields, systematic_variation_fields
+):
+    """Only systematics varying the inputs of the function re-evaluate it."""
+    array = {**event_id_fields, **systematic_variation_fields}
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+    events = NanoEventsFactory.from_preloaded(
+        src, metadata={"dataset": "test_map"}, schemaclass=NtupleSchema
+    ).events()
+
+    assert events.varied_fields == {
+        "EG_RESOLUTION_ALL__1up": {"el": ["pt"]},
+        "JET_EnergyResolution__1up": {"jet": ["pt"]},
+    }
+
+    calls = []
+
+    def jet_pt(ev):
+        calls.append(getattr(ev, "systematic", "nominal"))
+        return ev.jet.pt * 2
+
+    results = events.map_systematics(jet_pt)
+    assert list(results) == events.systematic_names
+    assert calls == ["nominal", "JET_EnergyResolution__1up"]
+    assert results["EG_RESOLUTION_ALL__1up"] is results["NOSYS"]
+    assert results["JET_EnergyResolution__1up"].to_list() == [
+        [210.0, 310.0],
+        [],
+        [260.0],
+    ]
+
+    calls.clear()
+    results = events.map_systematics(jet_pt, inputs=["jet.eta"])
+    assert calls == ["nominal"]
+
+    calls.clear()
+    results = events.map_systematics(jet_pt, inputs=["jet", "el.pt"])
+    assert calls == [
+        "nominal",
+        "EG_RESOLUTION_ALL__1up",
+        "JET_EnergyResolution__1up",
+    ]
+
+    # fields selected with tuples and lists are traced too
+    varied = [[105.0, 155.0], [], [130.0]]
+    results = events.map_systematics(lambda ev: ev["jet", "pt"])
+    assert results["JET_EnergyResolution__1up"].to_list() == varied
+    assert results["EG_RESOLUTION_ALL__1up"] is results["NOSYS"]
+    results = events.map_systematics(lambda ev: ev[["jet"]].jet.pt)
+    assert results["JET_EnergyResolution__1up"].to_list() == varied
+
+    # nothing read by name: every variation is evaluated
+    def unzipped_jet_pt(ev):
+        return ak.unzip(ev)[ev.fields.index("jet")].pt
+
+    results = events.map_systematics(unzipped_jet_pt)
+    assert results["JET_EnergyResolution__1up"].to_list() == varied
+    assert results["EG_RESOLUTION_ALL__1up"] is not results["NOSYS"]
+
+
+def test_iter_systematics_releases_views(event_id_fields, systematic_variation_fields):
+    """Views are built one at a time and not kept alive by the events."""
+    array = {**event_id_fields, **systematic_variation_fields}
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+    events = NanoEventsFactory.from_preloaded(
+        src, metadata={"dataset": "test_iter"}, schemaclass=NtupleSchema
+    ).events()
+
+    refs = []
+    names = []
+    for name, view in events.iter_systematics():
+        assert events[name] is view
+        assert view.systematic == name
+        names.append(name)
+        refs.append(weakref.ref(view))
+    del view
+    gc.collect()
+
+    assert names == events.systematic_names[1:]
+    assert all(ref() is None for ref in refs)
+    assert not events.__dict__.get("_systematic_views")
+
+    views = []
+    for _name, view in events.iter_systematics(
+        ["NOSYS", *events.systematic_names[1:]], max_resident=None
+    ):
+        views.append(view)
+        assert all(events[v.systematic] is v for v in views[1:])
+    assert views[0] is events
+    assert views[2].jet.pt.to_list() == [[105.0, 155.0], [], [130.0]]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_systematics_after_reassigning_nominal(
+    event_id_fields, systematic_variation_fields, lazy
+):
+    """Variations stay consistent when the nominal collections are sorted or filtered."""
+    array = {**event_id_fields, **systematic_variation_fields}
+    schemaclass = type("LazySchema", (NtupleSchema,), {"lazy_systematics": lazy})
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+    events = NanoEventsFactory.from_preloaded(
+        src, metadata={"dataset": "test_reassign"}, schemaclass=schemaclass
+    ).events()
+    syst = "JET_EnergyResolution__1up"
+    assert events[syst].jet.pt.to_list() == [[105.0, 155.0], [], [130.0]]
+
+    # views assembled before are dropped together with the replaced collection
+    events["jet"] = events.jet[ak.argsort(events.jet.eta, ascending=False)]
+    if lazy:
+        with pytest.raises(ValueError, match="'jet' collection was reassigned"):
+            events[syst]
+        return
+    assert events[syst].jet.pt.to_list() == [[105.0, 155.0], [], [130.0]]
+    assert events[syst].jet.eta.to_list() == [[0.5, 1.8], [], [1.2]]
+    assert events[syst].jet.mass.to_list() == [[125.0, 12.0], [], [83.0]]
+    # collections that were not reassigned are still shared with nominal
+    assert ak.to_layout(events[syst].el) is ak.to_layout(events.el)
+
+    events["jet"] = events.jet[events.jet.pt > 120]
+    assert events[syst].jet.pt.to_list() == [[105.0, 155.0], [], [130.0]]
+    assert events[syst].jet.eta.to_list() == [[0.5, 1.8], [], [1.2]]
+
+    # selecting events keeps the nominal collections lined up with the variation
+    selected = events[ak.Array([True, False, True])]
+    assert selected[syst].el.pt.to_list() == [[50.0], []]
+    assert ak.to_layout(selected[syst].el).content is ak.to_layout(events.el)
+
+
+def test_systematics_ignore_unrelated_collections(event_id_fields):
+    """Collections without varied fields are not built to assemble a variation."""
+    array = {
+        **event_id_fields,
+        "jet_pt_NOSYS": ak.Array([[1.0, 2.0], [], [3.0]]),
+        "jet_pt_JES__1up": ak.Array([[2.0, 3.0], [], [4.0]]),
+        "jet_eta": ak.Array([[0.1, 0.5], [], [0.3]]),
+        "jet_phi": ak.Array([[0.1, 0.2], [], [0.3]]),
+        "jet_m": ak.Array([[1.0, 5.0], [], [3.0]]),
+        # not enough coordinates to build a jet behavior
+        "truthjet_pt": ak.Array([[1.0], [], [2.0]]),
+    }
+    src = SimplePreloadedColumnSource(array, uuid4(), 3, object_path="/Events")
+    with pytest.warns(RuntimeWarning):
+        events = NanoEventsFactory.from_preloaded(
+            src, metadata={"dataset": "test_unrelated"}, schemaclass=NtupleSchema
+        ).events()
+
+    assert events.JES__1up.jet.pt.to_list() == [[2.0, 3.0], [], [4.0]]
+
+
+@pytest.fixture
+def ntuple_path(tmp_path):
+    pt = ak.Array([[10.0, 20.0], [], [30.0]])
+    jet = ak.zip(
+        {
+            "pt_NOSYS": pt,
+            "eta": pt / 10,
+            "phi": pt / 100,
+            "m": pt,
+            "pt_JES__1up": pt + 1,
+        }
+    )
+    el = ak.zip({"pt_NOSYS": pt, "eta": pt / 10, "phi": pt / 100})
+    with uproot.recreate(tmp_path / "ntuple.root") as file:
+        file.mktree(
+            "reco",
+            {"eventNumber": "int64", "jet": jet.type.content, "el": el.type.content},
+            counter_name=lambda counted: f"n{counted}",
+            field_name=lambda outer, inner: f"{outer}_{inner}",
+        )
+        file["reco"].extend({"eventNumber": np.arange(3), "jet": jet, "el": el})
+    return str(tmp_path / "ntuple.root")
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_iter_systematics_virtual(ntuple_path):
+    """Virtual views read the variation from fresh nodes, over the nominal collections."""
+    events = NanoEventsFactory.from_root(
+        {ntuple_path: "reco"}, schemaclass=NtupleSchema, mode="virtual"
+    ).events()
+
+    for name, view in events.iter_systematics():
+        assert name == "JES__1up"
+        assert events[name] is view
+        assert view.jet.pt.tolist() == [[11.0, 21.0], [], [31.0]]
+        assert view.jet.eta.tolist() == events.jet.eta.tolist()
+        # unvaried collections are the nominal ones
+        assert ak.to_layout(view.el) is ak.to_layout(events.el)
+    # the variation is not read from the nodes cached by the events
+    assert not ak.to_layout(events.JES__1up.jet).content["pt"].data.is_materialized
+
+    selected = events[events.eventNumber != 1]
+    assert selected.JES__1up.jet.pt.tolist() == [[11.0, 21.0], [31.0]]
+    assert systematic_view(selected, "JES__1up").el.pt.tolist() == [
+        [10.0, 20.0],
+        [30.0],
+    ]
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_iter_systematics_dask(ntuple_path):
+    """Dask views are task graphs reading only the varied branches on top of nominal."""
+    dak = pytest.importorskip("dask_awkward")
+    events = NanoEventsFactory.from_root(
+        {ntuple_path: "reco"}, schemaclass=NtupleSchema, mode="dask"
+    ).events()
+
+    view = systematic_view(events, "JES__1up")
+    (columns,) = dak.report_necessary_columns(view.jet.pt).values()
+    assert "jet_pt_JES__1up" in columns
+    assert view.jet.pt.compute().tolist() == [[11.0, 21.0], [], [31.0]]
+
+    views = dict(iter_systematics(events, ["NOSYS", "JES__1up"]))
+    assert views["NOSYS"] is events
+    assert views["JES__1up"].jet.eta.compute().tolist() == [[1.0, 2.0], [], [3.0]]
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from typing import Any, ClassVar
+
+import awkward as ak
+import numpy as np
+import pytest
+import uproot
+from coffea.nanoevents import NanoEventsFactory
+
+from atlas_schema.schema import NtupleSchema
+from atlas_schema.tracing import AccessTrace
+
+
+@pytest.fixture
+def path(tmp_path):
+    pt = ak.Array([[10.0, 20.0], [], [30.0]])
+    jet = ak.zip(
+        {
+            "pt_NOSYS": pt,
+            "eta": pt / 10,
+            "phi": pt / 100,
+            "m": pt,
+            "pt_JES__1up": pt + 1,
+        }
+    )
+    el = ak.zip({"pt_NOSYS": pt, "eta": pt / 10, "phi": pt / 100})
+    with uproot.recreate(tmp_path / "ntuple.root") as file:
+        file.mktree(
+            "reco",
+            {
+                "eventNumber": "int64",
+                "runNumber": "int64",
+                "weight_mc_NOSYS": "float32",
+                "jet": jet.type.content,
+                "el": el.type.content,
+            },
+            counter_name=lambda counted: f"n{counted}",
+            field_name=lambda outer, inner: f"{outer}_{inner}",
+        )
+        file["reco"].extend(
+            {
+                "eventNumber": np.arange(3),
+                "runNumber": np.arange(3),
+                "weight_mc_NOSYS": np.ones(3, dtype=np.float32),
+                "jet": jet,
+                "el": el,
+            }
+        )
+    return str(tmp_path / "ntuple.root")
+
+
+def read_events(
+    path: str, schemaclass: type[NtupleSchema] = NtupleSchema, **kwargs: Any
+) -> ak.Array:
+    return NanoEventsFactory.from_root(
+        {path: "reco"}, schemaclass=schemaclass, mode="virtual", **kwargs
+    ).events()
+
+
+def select(events: ak.Array) -> list[list[float]]:
+    selected: list[list[float]] = events.JES__1up.jet.pt[events.el.mass > 0].tolist()
+    return selected
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_trace_report(path):
+    trace = AccessTrace()
+    events = read_events(path, access_log=trace)
+    expected = select(events)
+
+    report = trace.report(events)
+    assert report["fields"] == ["el.mass", "jet.pt"]
+    assert report["systematics"] == ["JES__1up"]
+    # mass of the electrons is a constant shaped like their (renamed) pt
+    assert "el_pt_NOSYS" in report["branches"]
+    # coordinates are kept for the vector behaviors, but not read
+    assert {"el_eta", "jet_m"} <= set(report["branches"])
+    assert {"jet_m", "el_eta"}.isdisjoint(trace.branches())
+    assert "weight_mc_NOSYS" not in report["branches"]
+    assert {"eventNumber", "runNumber"} <= set(report["branches"])
+
+    branches = trace.minimal_branches(events)
+    rerun = AccessTrace()
+    events = read_events(
+        path, access_log=rerun, iteritems_options={"filter_name": branches}
+    )
+    assert "weight" not in events.fields
+    assert select(events) == expected
+    assert rerun.branches() == trace.branches()
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_trace_shared_buffers(path):
+    trace = AccessTrace()
+    events = read_events(path, access_log=trace)
+    ak.num(events.JES__1up.jet.eta)
+
+    report = trace.report(events)
+    # the variation only shares the nominal offsets and eta
+    assert report["systematics"] == []
+    assert "jet_pt_JES__1up" not in report["branches"]
+    assert {"jet_pt_NOSYS", "jet_eta", "jet_phi", "jet_m"} <= set(report["branches"])
+
+
+def test_trace_added_branches(path):
+    trace = AccessTrace()
+    trace.add(["jet_eta"])
+    with pytest.warns(RuntimeWarning):
+        events = read_events(path)
+    assert trace.report(events)["fields"] == ["jet.eta"]
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_trace_keeps_schema_event_ids(path):
+    class RunOnlySchema(NtupleSchema):
+        event_ids: ClassVar[set[str]] = {"runNumber"}
+
+    trace = AccessTrace()
+    events = read_events(path, access_log=trace, schemaclass=RunOnlySchema)
+    events.jet.pt.tolist()
+
+    branches = trace.minimal_branches(events)
+    assert "runNumber" in branches
+    assert "eventNumber" not in branches
+    assert "eventNumber" in trace.minimal_branches(events, keep=["eventNumber"])
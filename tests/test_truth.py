@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import awkward as ak
+import pytest
+
+from atlas_schema.enums import ParticleOrigin, ParticleType
+from atlas_schema.truth import LEPTONS, PHOTONS, TruthClassifier
+
+
+def test_truth_classifier_first_class_wins():
+    classifier = TruthClassifier(
+        {
+            "prompt_electron": [(["IsoElectron"], ["WBoson", "ZBoson"])],
+            "electron": [(["IsoElectron", "NonIsoElectron"], None)],
+            "b": [(None, ["BottomMeson"])],
+        },
+        default=-9,
+    )
+    types = ak.Array([[2, 2, 3], [], [6, 99]])
+    origins = ak.Array([[12, 26, 26], [], [26, 12]])
+    assert classifier(types, origins).to_list() == [[0, 1, 1], [], [2, -9]]
+    assert classifier.mask(types, origins, "b", "prompt_electron").to_list() == [
+        [True, False, False],
+        [],
+        [True, False],
+    ]
+    assert classifier.table[ParticleType.IsoElectron, ParticleOrigin.top] == 1
+    with pytest.raises(ValueError, match="'c' is not in list"):
+        classifier.mask(types, origins, "c")
+
+
+def test_truth_classifier_presets():
+    types = ak.Array(
+        [
+            [
+                ParticleType.IsoElectron,
+                ParticleType.NonIsoMuon,
+                ParticleType.BkgElectron,
+                ParticleType.NonIsoElectron,
+                ParticleType.Hadron,
+            ]
+        ]
+    )
+    origins = ak.Array(
+        [
+            [
+                ParticleOrigin.ZBoson,
+                ParticleOrigin.BottomMeson,
+                ParticleOrigin.PhotonConv,
+                ParticleOrigin.TauLep,
+                ParticleOrigin.LightMeson,
+            ]
+        ]
+    )
+    assert [
+        LEPTONS.labels[i] if i >= 0 else None for i in LEPTONS(types, origins)[0]
+    ] == [
+        "prompt",
+        "heavy_flavour",
+        "conversion",
+        "tau_decay",
+        None,
+    ]
+    photons = PHOTONS(
+        ak.Array([[ParticleType.IsoPhoton, ParticleType.BkgPhoton]]),
+        ak.Array([[ParticleOrigin.SinglePhot, ParticleOrigin.PiZero]]),
+    )
+    assert [PHOTONS.labels[i] for i in photons[0]] == ["prompt", "hadron_decay"]
+
+
+def test_truth_classifier_dask():
+    dak = pytest.importorskip("dask_awkward")
+    types = ak.Array([[2, 3], [], [6], [4]])
+    origins = ak.Array([[12, 26], [], [13], [5]])
+    result = LEPTONS(
+        dak.from_awkward(types, npartitions=2), dak.from_awkward(origins, npartitions=2)
+    )
+    assert result.compute().to_list() == LEPTONS(types, origins).to_list()
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import awkward as ak
+import numpy as np
+import pytest
 
 import atlas_schema as ats
+from atlas_schema.utils import _bits_clear
 
 
 def test_isin():
@@ -26,3 +29,65 @@ def test_isin_moredimensions():
         [[[True], [True], [False]], [[False]], [[False], [False], [True]], [[True]]]
     )
     assert ak.all(ats.isin(array, test) == result)
+
+
+def test_isin_large_test_elements():
+    array = ak.Array([[1, 2, 3], [4], [], [5, 600, 7], [1000]])
+    test = ak.Array(list(range(0, 1000, 2)))
+    result = ak.Array([[False, True, False], [True], [], [False, True, False], [False]])
+    assert ak.all(ats.isin(array, test) == result)
+
+
+def test_isin_missing_values():
+    array = ak.Array([[1, None, 3], None, [2.5, 7], []])
+    for test in (ak.Array([1, 2, 7]), ak.Array([1, *range(7, 100)])):
+        assert ats.isin(array, test).to_list() == [
+            [True, False, False],
+            None,
+            [False, True],
+            [],
+        ]
+
+
+def test_isin_onedimensional():
+    array = ak.Array([1, 2, 3])
+    assert ats.isin(array, ak.Array([1])).to_list() == [True, False, False]
+
+
+def test_isin_dask():
+    dak = pytest.importorskip("dask_awkward")
+    array = ak.Array([[1, 2, 3], [4], [], [5, 600, 7], [None, 2], [1000]])
+    darray = dak.from_awkward(array, npartitions=3)
+    for test in (ak.Array([1, 2, 7]), ak.Array(list(range(0, 1000, 2)))):
+        result = ats.isin(darray, test)
+        # one membership task per partition, and the test elements stored once
+        added = set(dict(result.dask)) - set(dict(darray.dask))
+        assert len(added) == darray.npartitions + 1
+        assert result.compute().to_list() == ats.isin(array, test).to_list()
+
+
+def test_bits_clear():
+    words = ak.values_astype(ak.Array([[0, 2, 6], [], [4]]), "uint32")
+    masks = np.array([2, 4 | 2, 0])
+    passed = _bits_clear(masks, ["two", "both", "none"], words)
+    assert ak.fields(passed) == ["two", "both", "none"]
+    for field, mask in zip(["two", "both", "none"], masks):
+        assert passed[field].to_list() == ((words & mask) == 0).to_list()
+
+    with pytest.raises(TypeError, match="integers are needed"):
+        _bits_clear(masks, ["two", "both", "none"], words * 1.0)
+
+
+def test_bits_clear_dask():
+    dak = pytest.importorskip("dask_awkward")
+    words = ak.Array([[0, 2, 6], [], [4], [1, 3]])
+    dwords = dak.from_awkward(words, npartitions=2)
+    masks = np.array([2, 4])
+    result = _bits_clear(masks, ["two", "four"], dwords)
+    # a single task per partition
+    added = set(dict(result.dask)) - set(dict(dwords.dask))
+    assert len(added) == dwords.npartitions
+    assert (
+        result.compute().to_list()
+        == _bits_clear(masks, ["two", "four"], words).to_list()
+    )
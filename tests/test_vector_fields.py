@@ -3,15 +3,19 @@
 from __future__ import annotations
 
 import contextlib
+from typing import Any
 from uuid import uuid4
 
 import awkward as ak
+import coffea.nanoevents.transforms as _coffea_transforms
 import numpy as np
 import particle
 import pytest
 from coffea.nanoevents import NanoEventsFactory
 from coffea.nanoevents.mapping import SimplePreloadedColumnSource
+from coffea.nanoevents.mapping.preloaded import PreloadedSourceMapping
 
+from atlas_schema import transforms
 from atlas_schema.schema import NtupleSchema
 
 
@@ -275,3 +279,85 @@ def test_systematic_collection_has_materialized_fields():
     assert "rho" in ak.fields(syst.met), (
         "met.rho must be present via nominal-reuse path"
     )
+
+
+# ---------------------------------------------------------------------------
+# full_like forms: structural sharing
+# ---------------------------------------------------------------------------
+
+
+def test_full_like_form_matches_coffea_and_shares_nodes():
+    """full_like_form builds coffea's form (with a constant fill), copying only changed nodes."""
+    source: dict[str, Any] = {
+        "class": "ListOffsetArray",
+        "offsets": "i64",
+        "form_key": "el_pt_NOSYS%2C%21load",
+        "parameters": {"__doc__": "outer doc"},
+        "content": {
+            "class": "NumpyArray",
+            "primitive": "float32",
+            "inner_shape": [],
+            "form_key": "el_pt_NOSYS%2C%21load%2C%21content",
+            "parameters": {"__doc__": "inner doc"},
+        },
+    }
+    expected = _coffea_transforms.full_like_from_content_form(source, 0.5)
+    expected["content"]["form_key"] = expected["content"]["form_key"].replace(
+        "full_like_from_content", "constant_like_from_content"
+    )
+    memo: dict[tuple[str, float], dict[str, object]] = {}
+    form = transforms.full_like_form(source, 0.5, memo=memo)
+
+    assert form == expected
+    assert source["parameters"] == {"__doc__": "outer doc"}  # not mutated
+    assert form["content"]["inner_shape"] is source["content"]["inner_shape"]
+    assert transforms.full_like_form(source, 0.5, memo=memo) is form
+    assert transforms.full_like_form(source, 1.5, memo=memo) is not form
+
+
+def test_full_like_forms_shared_across_systematics(event_id_fields):
+    """The materialized electron mass is built once and shared by all variations."""
+    array = {
+        **event_id_fields,
+        "el_pt_NOSYS": ak.Array([[50.0], [60.0], []]),
+        "el_eta": ak.Array([[1.0], [1.5], []]),
+        "el_phi": ak.Array([[0.5], [1.0], []]),
+        # the variation changes the electrons, but not their pt
+        "el_effSF_NOSYS": ak.Array([[1.0], [1.0], []]),
+        "el_effSF_EL_EFF_ID__1up": ak.Array([[1.1], [1.1], []]),
+    }
+    events = make_events(array)
+    assert events.varied_fields["EL_EFF_ID__1up"] == {"el": ["effSF"]}
+    assert ak.all(events.EL_EFF_ID__1up.el.mass == events.el.mass)
+
+    def field(record: dict[str, Any], name: str) -> dict[str, Any]:
+        content: dict[str, Any] = list(record["contents"])[
+            list(record["fields"]).index(name)
+        ]
+        return content
+
+    schema = NtupleSchema(PreloadedSourceMapping._extract_base_form(array))
+    el = field(schema.form, "el")
+    syst_el = field(field(schema.form, "EL_EFF_ID__1up"), "el")
+    assert syst_el is not el
+    assert field(syst_el["content"], "mass") is field(el["content"], "mass")
+
+
+def test_constant_like_fields_share_a_single_value(event_id_fields):
+    """Constant fields are zero-stride views over the source shape, not full buffers."""
+    array = {
+        **event_id_fields,
+        "ph_pt_NOSYS": ak.Array([[80.0, 90.0], [], [100.0]]),
+        "ph_eta": ak.Array([[0.5, 1.0], [], [1.2]]),
+        "ph_phi": ak.Array([[0.1, 3.0], [], [0.8]]),
+    }
+    events = make_events(array)
+    mass = ak.to_layout(events.ph.mass)
+    assert mass.content.data.strides == (0,)
+    assert ak.all(ak.num(events.ph.mass) == ak.num(events.ph.pt))
+    assert ak.to_list(events.ph.charge + 1) == [[1.0, 1.0], [], [1.0]]
+
+    stack: list[object] = [ak.Array([[1.0, 2.0], [], [3.0]]), "2.5"]
+    transforms.constant_like_from_content(stack)
+    (result,) = stack
+    assert ak.to_list(result) == [[2.5, 2.5], [], [2.5]]